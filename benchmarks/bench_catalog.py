@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark: catalog filter + sort + page, list-of-dicts vs columnar.
+
+Generates synthetic catalogs and times one catalog page request the way
+the app used to do it (list comprehensions, sorted() with a lambda, then
+a slice) against the columnar CatalogFrame path (boolean masks, argsort
+over precomputed ranks, then building only the 12 books on the page) and
+against the top-k path used for early pages (argpartition, then sorting
+only the first page). The one-off frame build is reported separately,
+since it happens once per catalog version rather than per request. Also
+checks that all paths return the same page, ties included.
+
+Usage:
+    python benchmarks/bench_catalog.py                    # 10k, 100k, 1M books
+    python benchmarks/bench_catalog.py --sizes 10000 --repeat 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog import PRICE_RANGES, CatalogFrame  # noqa: E402
+
+CATEGORIES = ['Fiction', 'Science Fiction', 'Mystery', 'Romance', 'Fantasy',
+              'Biography', 'History', 'Science', 'Self-Help', 'Business']
+
+# (category, price range, sort field, reverse)
+QUERIES = [
+    (None, 'All Prices', 'title', False),
+    ('Fantasy', 'All Prices', 'price', True),
+    ('Mystery', '$15-$20', 'author', False),
+    (None, 'Under $15', 'price', False),
+]
+
+PER_PAGE = 12
+
+
+def make_books(n, seed=0):
+    rng = random.Random(seed)
+    authors = [f'Author {i}' for i in range(max(10, n // 20))]
+    return [{
+        'id': i + 1,
+        'title': f'Title {rng.randrange(n)}',  # duplicates on purpose, to exercise ties
+        'author': rng.choice(authors),
+        'price': round(rng.uniform(5, 40), 2),
+        'category': rng.choice(CATEGORIES),
+        'description': '',
+        'stock': rng.randrange(100),
+        'image': '📘',
+    } for i in range(n)]
+
+
+def list_page(books, category, price_range, field, reverse, page):
+    """The original bookstore_app.py path"""
+    filtered = books
+    if category is not None:
+        filtered = [b for b in filtered if b['category'] == category]
+    test = PRICE_RANGES[price_range]
+    if test is not None:
+        filtered = [b for b in filtered if test(b['price'])]
+    filtered = sorted(filtered, key=lambda x: x[field], reverse=reverse)
+    start = page * PER_PAGE
+    return len(filtered), filtered[start:start + PER_PAGE]
+
+
+def frame_page(frame, by_id, category, price_range, field, reverse, page):
+    positions = frame.sort(frame.filter(None, category, price_range), field, reverse)
+    ids = frame.ids[positions]
+    start = page * PER_PAGE
+    return len(ids), [by_id[i] for i in ids[start:start + PER_PAGE].tolist()]
+
+
+def top_k_page(frame, by_id, category, price_range, field, reverse, page):
+    positions = frame.filter(None, category, price_range)
+    start = page * PER_PAGE
+    ids = frame.ids[frame.top(positions, field, reverse, start + PER_PAGE)]
+    return len(positions), [by_id[i] for i in ids[start:start + PER_PAGE].tolist()]
+
+
+def best_of(repeat, fn, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(n, repeat):
+    books = make_books(n)
+    by_id = {b['id']: b for b in books}
+
+    started = time.perf_counter()
+    frame = CatalogFrame(books)
+    for field in ('title', 'author'):
+        frame.rank(field)
+    build = time.perf_counter() - started
+    print(f"\n{n:,} books  (frame build incl. ranks: {build * 1000:.1f} ms, once per catalog version)")
+    print(f"  {'query (page 1)':<38} {'list (ms)':>10} {'frame (ms)':>11} {'top-k (ms)':>11} {'speedup':>8}")
+
+    for category, price_range, field, reverse in QUERIES:
+        for page in (0, 3):
+            expected = list_page(books, category, price_range, field, reverse, page)
+            for path in (frame_page, top_k_page):
+                if path(frame, by_id, category, price_range, field, reverse, page) != expected:
+                    sys.exit(f"MISMATCH in {path.__name__} for {category}/{price_range}/{field}/{reverse} page {page}")
+
+        list_time = best_of(repeat, list_page, books, category, price_range, field, reverse, 0)
+        frame_time = best_of(repeat, frame_page, frame, by_id, category, price_range, field, reverse, 0)
+        top_k_time = best_of(repeat, top_k_page, frame, by_id, category, price_range, field, reverse, 0)
+        label = f"{category or 'All'} / {price_range} / {field}{' desc' if reverse else ''}"
+        print(f"  {label:<38} {list_time * 1000:>10.2f} {frame_time * 1000:>11.2f} {top_k_time * 1000:>11.2f} "
+              f"{list_time / top_k_time:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per query, best time is reported')
+    args = parser.parse_args()
+    for n in args.sizes:
+        run(n, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: server time per catalog interaction, full rerun vs fragment.
+
+Seeds a scratch data directory with a synthetic catalog, logs in with a
+few books in the cart and drives the Browse Books view through
+Streamlit's AppTest harness, clicking "Add to Cart" and "Next ▶️".
+Before fragments, every click reran the whole script (CSS, header, cart
+summary, filters, grid and pager) and then again for the st.rerun() that
+followed the click. With the catalog page as a fragment, a click reruns
+only the fragment: the grid, the pager and the cart badge.
+
+AppTest always executes the whole script, so a fragment rerun can't be
+timed from the outside. To compare like with like, both sides are
+reported as body time, the app's own code without Streamlit's per-rerun
+overhead: for a full rerun, its wall time minus the wall time of a
+rerun of an empty script (the overhead, also printed); for the
+fragment, the time its body took in that run (recorded by the app). A
+real fragment rerun costs its body time plus roughly that overhead.
+
+Usage:
+    python benchmarks/bench_fragments.py
+    python benchmarks/bench_fragments.py --books 20000 --repeat 10
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CATALOG_PAGE = "📖 Catalog page"
+
+
+def seed(n_books):
+    import storage
+    from catalog import BOOK_CATEGORIES
+
+    rng = random.Random(42)
+    books = [{
+        'id': i,
+        'title': f"Book {i:06d}",
+        'author': f"Author {rng.randint(1, n_books // 10 + 1)}",
+        'price': round(rng.uniform(5, 40), 2),
+        'category': rng.choice(BOOK_CATEGORIES),
+        'description': "A synthetic book",
+        'stock': rng.randint(0, 60),
+        'image': '📘',
+    } for i in range(1, n_books + 1)]
+    storage.save_json(storage.BOOKS_FILE, books)
+    return books
+
+
+def click(at, label):
+    """Click the first enabled button starting with label and time the rerun"""
+    for button in at.button:
+        if button.label.startswith(label) and not button.disabled:
+            button.click()
+            started = time.perf_counter()
+            at.run()
+            elapsed = time.perf_counter() - started
+            if at.exception:
+                raise RuntimeError(f"{label}: {at.exception[0].value}")
+            return elapsed, at.session_state.render_times.get(CATALOG_PAGE)
+    raise RuntimeError(f"no enabled '{label}' button")
+
+
+def rerun_overhead(repeat):
+    """Best wall time of an AppTest rerun of a script that does nothing"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string("import streamlit as st", default_timeout=120)
+    at.run()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(n_books, repeat):
+    from streamlit.testing.v1 import AppTest
+
+    data_dir = tempfile.mkdtemp(prefix='bookstore-fragments-')
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        books = seed(n_books)
+        from cart import Cart
+
+        at = AppTest.from_file(os.path.join(ROOT, 'bookstore_app.py'), default_timeout=120)
+        at.run()
+        cart = Cart()
+        for book in books[:3]:
+            cart.add(book)
+        at.session_state.logged_in = True
+        at.session_state.username = 'shopper'
+        at.session_state.cart = cart
+        at.run()
+
+        results = {}
+        for label in ("🛒 Add to Cart", "Next ▶️"):
+            timings = [click(at, label) for _ in range(repeat)]
+            full = min(elapsed for elapsed, _ in timings)
+            fragment = min((t for _, t in timings if t is not None), default=None)
+            results[label] = (full, fragment)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    overhead = rerun_overhead(repeat)
+    print(f"{n_books:,} books, best of {repeat} clicks (ms); "
+          f"Streamlit overhead per rerun (empty script): {overhead * 1000:.1f}")
+    print(f"  {'interaction':<20}{'full rerun':>12}{'full body':>12}{'fragment body':>15}")
+    for label, (full, fragment) in results.items():
+        fragment = f"{fragment * 1000:>15.1f}" if fragment is not None else f"{'-':>15}"
+        print(f"  {label:<20}{full * 1000:>12.1f}{(full - overhead) * 1000:>12.1f}{fragment}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5, help='clicks per interaction, best time is reported')
+    args = parser.parse_args()
+    run(args.books, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
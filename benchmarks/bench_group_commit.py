@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark: checkout throughput, one commit per checkout vs group commit.
+
+Seeds a scratch data directory with a small catalog, then has N threads
+(one per concurrent session) check out carts as fast as they can for a
+fixed number of orders each. The "per checkout" column is the sync path,
+orders.checkout(): every order takes the storage lock, validates its own
+stock and does its own stock write and orders append (and fsync). The
+"group commit" column sends the same checkouts through
+CheckoutQueue.place(), where the committer validates everything that
+arrived within the window against stock together and writes the batch
+with one stock update and one orders append.
+
+After each run it checks that no book was oversold and that order ids
+are unique. Order log fsync is "always" (the config default).
+
+Usage:
+    python benchmarks/bench_group_commit.py
+    python benchmarks/bench_group_commit.py --backend sqlite --sessions 1 10 100 --orders 2000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+N_BOOKS = 20
+
+
+def seed(stock):
+    import storage
+
+    books = [{'id': i, 'title': f"Book {i}", 'author': 'Bench', 'price': 10.0 + i, 'category': 'Fiction',
+              'description': '', 'stock': stock, 'image': '📘'} for i in range(1, N_BOOKS + 1)]
+    storage.save_json(storage.BOOKS_FILE, books)
+    storage.save_json(storage.ORDERS_FILE, [])
+    return books
+
+
+def run_sessions(n_sessions, n_orders, books, place):
+    """Check out n_orders carts spread over n_sessions threads; returns (seconds, placed)"""
+    from cart import Cart
+
+    per_session = [n_orders // n_sessions + (i < n_orders % n_sessions) for i in range(n_sessions)]
+    barrier = threading.Barrier(n_sessions + 1)
+    placed = [0] * n_sessions
+
+    def session(index):
+        carts = []
+        for k in range(per_session[index]):
+            cart = Cart()
+            cart.add(books[(index + k) % len(books)])
+            cart.add(books[(index * 7 + k) % len(books)])
+            carts.append(cart)
+        barrier.wait()
+        for cart in carts:
+            if place(f'bench{index}', cart):
+                placed[index] += 1
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(n_sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, sum(placed)
+
+
+def check(stock):
+    import storage
+
+    orders = storage.load_json(storage.ORDERS_FILE, [])
+    ids = [order['order_id'] for order in orders]
+    if len(ids) != len(set(ids)):
+        raise AssertionError("duplicate order ids")
+    sold = {}
+    for order in orders:
+        for item in order['items']:
+            sold[item['id']] = sold.get(item['id'], 0) + 1
+    levels = storage.get_stock()
+    for book_id, level in levels.items():
+        if level < 0 or level + sold.get(book_id, 0) != stock:
+            raise AssertionError(f"book {book_id}: stock {level}, sold {sold.get(book_id, 0)}")
+
+
+def run(backend, n_sessions, n_orders, mode, window_ms, max_batch):
+    """Throughput in orders/s of one mode ("sync" or "group") in a fresh data directory"""
+    data_dir = tempfile.mkdtemp(prefix=f'bookstore-group-{backend}-')
+    with open(os.path.join(data_dir, 'config.toml'), 'w') as f:
+        f.write(f'[storage]\nbackend = "{backend}"\n')
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        import settings
+        import storage
+        from checkout_queue import CheckoutQueue
+        from orders import checkout
+
+        settings.reset_settings()
+        storage.reset_backend()
+        stock = 2 * n_orders
+        books = seed(stock)
+        if mode == 'sync':
+            def place(username, cart):
+                return checkout(username, cart)[0]
+            seconds, placed = run_sessions(n_sessions, n_orders, books, place)
+            batches = placed
+        else:
+            committer = CheckoutQueue(max_batch=max_batch, window_ms=window_ms)
+
+            def place(username, cart):
+                return committer.place(username, cart, timeout=120)[0]
+            seconds, placed = run_sessions(n_sessions, n_orders, books, place)
+            committer.stop()
+            batches = committer.batches
+        storage.flush()
+        if placed != n_orders:
+            raise AssertionError(f"{mode}: placed {placed} of {n_orders} orders")
+        check(stock)
+        storage.reset_backend()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return n_orders / seconds, batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=['json', 'sqlite', 'both'], default='both')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--orders', type=int, default=1000, help='orders per run')
+    parser.add_argument('--window-ms', type=float, default=5)
+    parser.add_argument('--max-batch', type=int, default=100)
+    args = parser.parse_args()
+
+    backends = ['json', 'sqlite'] if args.backend == 'both' else [args.backend]
+    for backend in backends:
+        print(f"{backend}: {args.orders:,} checkouts, window {args.window_ms:g} ms, max batch {args.max_batch}")
+        print(f"  {'sessions':>8}{'per checkout/s':>16}{'group commit/s':>16}{'speedup':>9}{'commits':>9}")
+        for n_sessions in args.sessions:
+            sync, _ = run(backend, n_sessions, args.orders, 'sync', args.window_ms, args.max_batch)
+            group, batches = run(backend, n_sessions, args.orders, 'group', args.window_ms, args.max_batch)
+            print(f"  {n_sessions:>8}{sync:>16.0f}{group:>16.0f}{group / sync:>8.1f}x{batches:>9}")
+
+
+if __name__ == '__main__':
+    main()
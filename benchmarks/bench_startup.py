@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: app cold start and rerun time.
+
+Each sample starts a fresh Python process that runs the app script once
+through Streamlit's AppTest harness (the first script run in a server
+process: module imports, bootstrap, login page), then times warm reruns
+of the login page and of the logged-in catalog. Streamlit itself is
+imported before the clock starts, since a server has always loaded it.
+
+With --max-cold-ms / --max-rerun-ms it exits non-zero when the median
+goes over budget, so CI can catch startup regressions.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --samples 5 --max-cold-ms 1500 --max-rerun-ms 200
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample(app, reruns):
+    """Run in a fresh process: time the first script run, then warm reruns"""
+    import streamlit  # noqa: F401  (loaded by the server before any script run)
+    from streamlit.testing.v1 import AppTest
+
+    data_dir = tempfile.mkdtemp(prefix='bookstore-startup-')
+    shutil.copy(os.path.join(ROOT, 'books_200.json'), data_dir)
+    os.chdir(data_dir)
+    sys.path.insert(0, ROOT)
+    try:
+        at = AppTest.from_file(os.path.join(ROOT, app), default_timeout=120)
+        started = time.perf_counter()
+        at.run()
+        cold = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+        def rerun():
+            started = time.perf_counter()
+            at.run()
+            return time.perf_counter() - started
+
+        login = min(rerun() for _ in range(reruns))
+        at.session_state.logged_in = True
+        at.session_state.username = 'admin'
+        at.run()
+        catalog = min(rerun() for _ in range(reruns))
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return {'cold': cold, 'login': login, 'catalog': catalog}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', default='bookstore_app.py')
+    parser.add_argument('--samples', type=int, default=3, help='fresh processes; the median is reported')
+    parser.add_argument('--reruns', type=int, default=5, help='warm reruns per sample, best time is kept')
+    parser.add_argument('--max-cold-ms', type=float, help='fail if the median cold start is slower')
+    parser.add_argument('--max-rerun-ms', type=float, help='fail if a median warm rerun is slower')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(sample(args.app, args.reruns)))
+        return 0
+
+    samples = []
+    for _ in range(args.samples):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', '--app', args.app,
+                              '--reruns', str(args.reruns)], capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    median = {key: statistics.median(s[key] for s in samples) * 1000 for key in samples[0]}
+
+    print(f"{args.app}, median of {args.samples} processes (ms)")
+    print(f"  first script run (cold)   {median['cold']:>8.1f}")
+    print(f"  login page rerun          {median['login']:>8.1f}")
+    print(f"  catalog rerun             {median['catalog']:>8.1f}")
+
+    failures = []
+    if args.max_cold_ms is not None and median['cold'] > args.max_cold_ms:
+        failures.append(f"cold start {median['cold']:.1f} ms > {args.max_cold_ms} ms")
+    if args.max_rerun_ms is not None:
+        for key in ('login', 'catalog'):
+            if median[key] > args.max_rerun_ms:
+                failures.append(f"{key} rerun {median[key]:.1f} ms > {args.max_rerun_ms} ms")
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
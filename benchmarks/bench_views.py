@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: server render time per view, selective navigation vs st.tabs.
+
+Seeds a scratch data directory with the sample catalog and 200 orders
+(by default), logs in as admin with a full cart, then drives the app through
+Streamlit's AppTest harness: every view (and every admin section) is made
+active in turn and rerun several times, reading the render times the app
+records in session state. st.tabs ran every view's body on each rerun,
+so a rerun used to cost the sum of all views; now it costs only the
+active one. The report shows both for a typical rerun of each view.
+
+The times are the app's own render times (the view bodies, timed by the
+app), not the wall time of a rerun, which adds Streamlit's overhead.
+Under AppTest, View Orders gets much slower as orders grow (it renders
+widgets per order), so large --orders runs need a larger --timeout.
+
+Usage:
+    python benchmarks/bench_views.py
+    python benchmarks/bench_views.py --orders 500 --repeat 10 --timeout 1800
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ADMIN_PANEL = "⚙️ Admin Panel"
+ADMIN_SECTIONS = ["📚 Manage Books", "📦 View Orders", "📊 Analytics", "👥 Users"]
+
+
+def seed(data_dir, n_orders):
+    """Sample catalog plus n_orders random orders spread over the last 90 days"""
+    shutil.copy(os.path.join(ROOT, 'books_200.json'), data_dir)
+    import storage
+    from cart import Cart
+    from orders import ORDER_STATUSES
+
+    books = storage.load_json(os.path.join(data_dir, 'books_200.json'), [])
+    rng = random.Random(42)
+    now = time.time()
+    orders = []
+    for order_id in range(1, n_orders + 1):
+        cart = Cart()
+        for book in rng.sample(books, rng.randint(1, 4)):
+            cart.add(book, rng.randint(1, 2))
+        ts = now - rng.uniform(0, 90 * 86400)
+        orders.append({
+            'order_id': order_id,
+            'username': rng.choice(['admin'] + [f'user{i}' for i in range(50)]),
+            'items': cart.order_items(),
+            'subtotal': cart.subtotal,
+            'tax': cart.tax,
+            'shipping': cart.shipping,
+            'total': cart.total,
+            'ts': ts,
+            'date': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)),
+            'status': rng.choice(ORDER_STATUSES),
+        })
+    storage.save_json(storage.ORDERS_FILE, orders)
+    return books
+
+
+def best(at, label, repeat):
+    """Fastest recorded render time of a view over repeat reruns"""
+    times = []
+    for _ in range(repeat):
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"{label}: {at.exception[0].value}")
+        times.append(at.session_state.render_times[label])
+    return min(times)
+
+
+def run(n_orders, repeat, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    data_dir = tempfile.mkdtemp(prefix='bookstore-views-')
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        books = seed(data_dir, n_orders)
+        from cart import Cart
+
+        at = AppTest.from_file(os.path.join(ROOT, 'bookstore_app.py'), default_timeout=timeout)
+        at.run()
+        cart = Cart()
+        for book in books[:5]:
+            cart.add(book, 2)
+        at.session_state.logged_in = True
+        at.session_state.username = 'admin'
+        at.session_state.is_admin = True
+        at.session_state.cart = cart
+        at.run()
+
+        views = {}
+        for label in at.radio(key='active_view').options:
+            at.radio(key='active_view').set_value(label)
+            if label != ADMIN_PANEL:
+                views[label] = best(at, label, repeat)
+        at.radio(key='active_view').set_value(ADMIN_PANEL).run()
+        sections = {}
+        panel = {}
+        for section in ADMIN_SECTIONS:
+            at.radio(key='admin_view').set_value(section)
+            sections[section] = best(at, section, repeat)
+            panel[section] = at.session_state.render_times[ADMIN_PANEL]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    # The admin panel used to render its header plus all four sections
+    header = min(panel[section] - sections[section] for section in ADMIN_SECTIONS)
+    views[ADMIN_PANEL] = header + sum(sections.values())
+    tabs_total = sum(views.values())
+
+    print(f"{n_orders:,} orders, app render time of the active view, best of {repeat} reruns (ms)")
+    print(f"  {'active view':<36}{'selective':>10}{'st.tabs':>10}{'saved':>10}")
+    for label, seconds in views.items():
+        rows = [(label, seconds)] if label != ADMIN_PANEL else [
+            (f"{ADMIN_PANEL} › {section}", header + sections[section]) for section in ADMIN_SECTIONS]
+        for name, now in rows:
+            print(f"  {name:<36}{now * 1000:>10.1f}{tabs_total * 1000:>10.1f}"
+                  f"{(tabs_total - now) * 1000:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5, help='reruns per view, best time is reported')
+    parser.add_argument('--timeout', type=float, default=600, help='seconds allowed per AppTest script run')
+    args = parser.parse_args()
+    run(args.orders, args.repeat, args.timeout)
+
+
+if __name__ == '__main__':
+    main()
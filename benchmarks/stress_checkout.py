@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Stress test: concurrent checkouts must never oversell a book.
+
+Starts N shopper processes against a scratch data directory. They all
+release at the same moment and check out carts competing for a few
+low-stock books, then check the same cart out again (a double click).
+Then it verifies that stock never went negative, that every unit sold is
+accounted for by exactly one order, that orders have unique ids, that a
+repeated checkout returned the original order, and that the materialized
+order statistics match a recount.
+
+Usage:
+    python benchmarks/stress_checkout.py                 # both backends, 50 shoppers
+    python benchmarks/stress_checkout.py --backend sqlite --shoppers 200
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BOOKS = [
+    {'id': 1, 'title': 'Scarce A', 'author': 'Test', 'price': 10.0, 'category': 'Fiction',
+     'description': '', 'stock': 7, 'image': '📕'},
+    {'id': 2, 'title': 'Scarce B', 'author': 'Test', 'price': 12.0, 'category': 'Fiction',
+     'description': '', 'stock': 13, 'image': '📗'},
+    {'id': 3, 'title': 'Plenty', 'author': 'Test', 'price': 8.0, 'category': 'Fiction',
+     'description': '', 'stock': 1000, 'image': '📘'},
+]
+
+
+def shopper(data_dir, barrier, seed, results):
+    """Build a random cart, wait for everyone, then check out once"""
+    os.chdir(data_dir)
+    import storage
+    from cart import Cart
+    from orders import checkout
+
+    rng = random.Random(seed)
+    cart = Cart()
+    for book in BOOKS:
+        quantity = rng.randint(0, 3)
+        if quantity:
+            cart.add(book, quantity)
+    if not cart:
+        cart.add(BOOKS[0])
+
+    barrier.wait()
+    success, message, order = checkout(f'shopper{seed}', cart)
+    _, _, repeat = checkout(f'shopper{seed}', cart)
+    storage.flush()
+    results.put((seed, success, message, order['order_id'] if order else None,
+                 repeat['order_id'] if repeat else None))
+
+
+def run(backend, shoppers):
+    data_dir = tempfile.mkdtemp(prefix=f'bookstore-stress-{backend}-')
+    with open(os.path.join(data_dir, 'config.toml'), 'w') as f:
+        f.write(f'[storage]\nbackend = "{backend}"\n')
+
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        import settings
+        import storage
+        settings.reset_settings()
+        storage.reset_backend()
+        storage.save_json(storage.BOOKS_FILE, BOOKS)
+        storage.save_json(storage.ORDERS_FILE, [])
+
+        ctx = multiprocessing.get_context('spawn')
+        barrier = ctx.Barrier(shoppers)
+        results = ctx.Queue()
+        procs = [ctx.Process(target=shopper, args=(data_dir, barrier, seed, results)) for seed in range(shoppers)]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        outcomes = [results.get(timeout=120) for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        storage.reset_backend()
+        stock = storage.get_stock()
+        orders = storage.load_json(storage.ORDERS_FILE, [])
+        drift = storage.check_order_stats()
+    finally:
+        os.chdir(cwd)
+
+    sold = {book['id']: 0 for book in BOOKS}
+    for order in orders:
+        for item in order['items']:
+            sold[item['id']] += 1
+
+    failures = []
+    ids = [order['order_id'] for order in orders]
+    if len(ids) != len(set(ids)):
+        failures.append(f"duplicate order ids: {sorted(ids)}")
+    placed = sum(1 for _, success, _, _, _ in outcomes if success)
+    for seed, success, _, order_id, repeat_id in outcomes:
+        if success and repeat_id != order_id:
+            failures.append(f"shopper{seed}: repeated checkout gave order {repeat_id}, not {order_id}")
+    if placed != len(orders):
+        failures.append(f"{placed} checkouts reported success but {len(orders)} orders were stored")
+    for book in BOOKS:
+        remaining = stock[book['id']]
+        if remaining < 0:
+            failures.append(f"book {book['id']} oversold: stock is {remaining}")
+        if remaining + sold[book['id']] != book['stock']:
+            failures.append(f"book {book['id']}: {sold[book['id']]} sold + {remaining} left "
+                            f"!= {book['stock']} initial")
+
+    for view, key, field, stored, expected in drift:
+        failures.append(f"order stats drifted: {view} {key!r} {field} is {stored}, recounted {expected}")
+
+    rejected = shoppers - placed
+    print(f"[{backend}] {shoppers} concurrent checkouts in {elapsed:.2f}s: "
+          f"{placed} placed, {rejected} rejected as out of stock; "
+          f"remaining stock {dict(sorted(stock.items()))}")
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backend', choices=['json', 'sqlite', 'all'], default='all')
+    parser.add_argument('--shoppers', type=int, default=50)
+    args = parser.parse_args()
+
+    backends = ['json', 'sqlite'] if args.backend == 'all' else [args.backend]
+    ok = all([run(backend, args.shoppers) for backend in backends])
+    print("✅ No oversell" if ok else "❌ Stress test failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
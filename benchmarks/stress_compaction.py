@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Stress test: order log compaction while other processes use the log.
+
+First a deterministic check: one OrderLog indexes a few orders, a second
+one on the same file compacts it twice (a file replaced twice can get
+its original inode back) and appends more orders than before. The first
+must then notice the rewrite and read every order correctly.
+
+Then N shopper processes check out orders and read their own history
+back while another process compacts the log in a loop. Every order
+placed must still be in the log afterwards, exactly once, with nothing
+lost to a compaction and no reader tripped up by stale offsets.
+
+Usage:
+    python benchmarks/stress_compaction.py
+    python benchmarks/stress_compaction.py --shoppers 12 --orders 50
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BOOK = {'id': 1, 'title': 'Plenty', 'author': 'Test', 'price': 8.0, 'category': 'Fiction',
+        'description': '', 'stock': 1_000_000, 'image': '📘'}
+
+
+def make_order(order_id, username):
+    return {'order_id': order_id, 'username': username, 'items': [], 'subtotal': 1.0, 'tax': 0.0,
+            'shipping': 0.0, 'total': 1.0, 'ts': time.time(), 'date': '', 'status': 'Pending',
+            'token': f'token-{order_id}'}
+
+
+def check_double_compaction():
+    """Two OrderLog instances on one file; one of them compacts twice"""
+    import storage
+
+    data_dir = tempfile.mkdtemp(prefix='bookstore-compaction-')
+    try:
+        path = os.path.join(data_dir, storage.ORDER_LOG_FILE)
+        reader = storage.OrderLog(path)
+        writer = storage.OrderLog(path)
+        reader.append_many([make_order(i, 'alice') for i in range(1, 6)])
+        if len(reader.for_user('alice')) != 5:
+            return ["reader doesn't see its own orders"]
+        writer.compact()
+        writer.compact()
+        writer.append_many([make_order(i, 'bob') for i in range(6, 12)])
+        alice = [order['order_id'] for order in reader.for_user('alice')]
+        bob = [order['order_id'] for order in reader.for_user('bob')]
+    except Exception as e:
+        return [f"reader failed after a double compaction: {e!r}"]
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    failures = []
+    if alice != list(range(1, 6)):
+        failures.append(f"alice's orders after a double compaction: {alice}")
+    if bob != list(range(6, 12)):
+        failures.append(f"bob's orders after a double compaction: {bob}")
+    return failures
+
+
+def shopper(data_dir, barrier, seed, n_orders, results):
+    """Check out n_orders carts, reading the history back after each one"""
+    os.chdir(data_dir)
+    import storage
+    from cart import Cart
+    from orders import checkout
+
+    username = f'shopper{seed}'
+    placed, error = [], None
+    barrier.wait()
+    try:
+        for _ in range(n_orders):
+            cart = Cart()
+            cart.add(BOOK)
+            success, message, order = checkout(username, cart)
+            if not success:
+                raise RuntimeError(message)
+            placed.append(order['order_id'])
+            seen = [o['order_id'] for o in storage.get_user_orders(username)]
+            if seen != placed:
+                raise RuntimeError(f"history {seen} != placed {placed}")
+    except Exception as e:
+        error = repr(e)
+    results.put((seed, placed, error))
+
+
+def compactor(data_dir, stop, results):
+    """Compact the order log until told to stop"""
+    os.chdir(data_dir)
+    import storage
+
+    runs, error = 0, None
+    try:
+        while not stop.is_set():
+            storage.get_backend().orders.compact()
+            runs += 1
+    except Exception as e:
+        error = repr(e)
+    results.put(('compactor', runs, error))
+
+
+def check_concurrent(shoppers, n_orders):
+    data_dir = tempfile.mkdtemp(prefix='bookstore-compaction-')
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        import settings
+        import storage
+        settings.reset_settings()
+        storage.reset_backend()
+        storage.save_json(storage.BOOKS_FILE, [BOOK])
+        storage.save_json(storage.ORDERS_FILE, [])
+
+        ctx = multiprocessing.get_context('spawn')
+        barrier = ctx.Barrier(shoppers)
+        stop = ctx.Event()
+        results = ctx.Queue()
+        procs = [ctx.Process(target=shopper, args=(data_dir, barrier, seed, n_orders, results))
+                 for seed in range(shoppers)]
+        compacting = ctx.Process(target=compactor, args=(data_dir, stop, results))
+        compacting.start()
+        for p in procs:
+            p.start()
+        outcomes = [results.get(timeout=300) for _ in procs]
+        stop.set()
+        compaction = results.get(timeout=300)
+        for p in procs + [compacting]:
+            p.join()
+
+        storage.reset_backend()
+        stored = [order['order_id'] for order in storage.load_json(storage.ORDERS_FILE, [])]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    failures = []
+    placed = []
+    for seed, ids, error in outcomes:
+        placed.extend(ids)
+        if error:
+            failures.append(f"shopper{seed}: {error}")
+    _, runs, error = compaction
+    if error:
+        failures.append(f"compactor: {error}")
+    if sorted(stored) != sorted(placed) or len(stored) != len(set(stored)):
+        missing = sorted(set(placed) - set(stored))
+        failures.append(f"{len(placed)} orders placed but {len(stored)} stored (missing: {missing[:10]})")
+    print(f"{shoppers} shoppers placed {len(placed)} orders while the log was compacted {runs} times")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--shoppers', type=int, default=6)
+    parser.add_argument('--orders', type=int, default=30, help='orders per shopper')
+    args = parser.parse_args()
+
+    failures = check_double_compaction() + check_concurrent(args.shoppers, args.orders)
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    print("✅ Compaction kept every order" if not failures else "❌ Compaction stress test failed")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
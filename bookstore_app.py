@@ -1,9 +1,19 @@
 import streamlit as st
-import pandas as pd
 import json
 import hashlib
-from datetime import datetime
+from datetime import datetime, timedelta
+import io
 import os
+import time
+
+import catalog
+import checkout_queue
+import stats
+import storage
+import theme
+from cart import Cart
+from orders import FREE_SHIPPING_THRESHOLD, ORDER_STATUSES, bulk_update_status, checkout
+from storage import USERS_FILE, BOOKS_FILE, ORDERS_FILE, load_json, save_json
 
 # Page configuration
 st.set_page_config(
@@ -20,35 +30,20 @@ if 'username' not in st.session_state:
 if 'is_admin' not in st.session_state:
     st.session_state.is_admin = False
 if 'cart' not in st.session_state:
-    st.session_state.cart = []
-
-# File paths for data storage
-USERS_FILE = 'users.json'
-BOOKS_FILE = 'books.json'
-ORDERS_FILE = 'orders.json'
+    st.session_state.cart = Cart()
+if 'pending_orders' not in st.session_state:
+    st.session_state.pending_orders = {}  # order id -> cart token, for queued checkouts not placed yet
+    st.session_state.order_notices = []   # finished queued checkouts to report
+if 'render_times' not in st.session_state:
+    st.session_state.render_times = {}  # view label -> seconds its last full render took
 
 # Helper functions for data management
-def load_json(filename, default):
-    """Load JSON data from file"""
-    if os.path.exists(filename):
-        try:
-            with open(filename, 'r') as f:
-                return json.load(f)
-        except:
-            return default
-    return default
-
-def save_json(filename, data):
-    """Save data to JSON file"""
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=2)
-
 def hash_password(password):
     """Hash password using SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
 
 def initialize_data():
-    """Initialize default data if files don't exist"""
+    """Initialize default data if files don't exist (run once per process by storage.bootstrap)"""
     # Initialize users
     users = load_json(USERS_FILE, {})
     if not users:
@@ -88,7 +83,7 @@ def initialize_data():
             save_json(BOOKS_FILE, books)
     
     # Initialize orders
-    if not os.path.exists(ORDERS_FILE):
+    if not storage.exists(ORDERS_FILE):
         save_json(ORDERS_FILE, [])
 
 # Authentication functions
@@ -127,157 +122,118 @@ def logout_user():
     st.session_state.logged_in = False
     st.session_state.username = None
     st.session_state.is_admin = False
-    st.session_state.cart = []
+    st.session_state.cart = Cart()
+    st.session_state.pending_orders = {}
+    st.session_state.order_notices = []
 
 # Book management functions
+def get_catalog():
+    """Get the process-wide catalog cache shared by all sessions"""
+    return catalog.get_cache(BOOKS_FILE, lambda: load_json(BOOKS_FILE, []),
+                             lambda: storage.signature(BOOKS_FILE),
+                             storage.get_stock, storage.stock_signature)
+
 def get_books():
-    """Get all books"""
-    return load_json(BOOKS_FILE, [])
+    """Get all books as read-only views from the shared catalog cache"""
+    return get_catalog().get()
 
 def add_book(book_data):
     """Add a new book"""
-    books = get_books()
-    new_id = max([b['id'] for b in books], default=0) + 1
-    book_data['id'] = new_id
-    books.append(book_data)
-    save_json(BOOKS_FILE, books)
+    with storage.transaction():
+        books = load_json(BOOKS_FILE, [])
+        new_id = max([b['id'] for b in books], default=0) + 1
+        book_data['id'] = new_id
+        books.append(book_data)
+        get_catalog().update(lambda: save_json(BOOKS_FILE, books), upserts=[book_data])
     return True
 
 def update_book(book_id, book_data):
     """Update existing book"""
-    books = get_books()
-    for i, book in enumerate(books):
-        if book['id'] == book_id:
-            book_data['id'] = book_id
-            books[i] = book_data
-            save_json(BOOKS_FILE, books)
-            return True
+    def write():
+        save_json(BOOKS_FILE, books)
+        storage.set_stock(book_id, book_data['stock'])
+    
+    with storage.transaction():
+        books = load_json(BOOKS_FILE, [])
+        for i, book in enumerate(books):
+            if book['id'] == book_id:
+                book_data['id'] = book_id
+                books[i] = book_data
+                get_catalog().update(write, upserts=[book_data])
+                return True
     return False
 
 def delete_book(book_id):
     """Delete a book"""
-    books = get_books()
-    books = [b for b in books if b['id'] != book_id]
-    save_json(BOOKS_FILE, books)
+    with storage.transaction():
+        books = load_json(BOOKS_FILE, [])
+        books = [b for b in books if b['id'] != book_id]
+        get_catalog().update(lambda: save_json(BOOKS_FILE, books), deletes=[book_id])
     return True
 
 # Cart functions
 def add_to_cart(book):
     """Add book to cart"""
-    st.session_state.cart.append(book)
+    st.session_state.cart.add(book)
 
-def remove_from_cart(index):
-    """Remove book from cart"""
-    if 0 <= index < len(st.session_state.cart):
-        st.session_state.cart.pop(index)
+def remove_from_cart(book_id):
+    """Remove every copy of a book from cart"""
+    st.session_state.cart.remove(book_id)
 
 def clear_cart():
     """Clear shopping cart"""
-    st.session_state.cart = []
+    st.session_state.cart.clear()
 
 def place_order():
-    """Place an order with validation"""
+    """Place an order with validation (queued for the background committer in queue mode,
+    group-committed with concurrent checkouts in group mode)"""
     if not st.session_state.cart:
         return False, "Cart is empty"
     
     try:
-        orders = load_json(ORDERS_FILE, [])
-        
-        # Calculate totals
-        subtotal = sum(item['price'] for item in st.session_state.cart)
-        tax = subtotal * 0.08
-        shipping = 5.99 if subtotal < 50 else 0
-        total = subtotal + tax + shipping
-        
-        order = {
-            'order_id': len(orders) + 1,
-            'username': st.session_state.username,
-            'items': st.session_state.cart.copy(),
-            'subtotal': round(subtotal, 2),
-            'tax': round(tax, 2),
-            'shipping': round(shipping, 2),
-            'total': round(total, 2),
-            'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'status': 'Pending'
-        }
-        orders.append(order)
-        save_json(ORDERS_FILE, orders)
-        
-        # Update inventory
-        books = get_books()
-        cart_items = {}
-        for item in st.session_state.cart:
-            cart_items[item['id']] = cart_items.get(item['id'], 0) + 1
-        
-        for book in books:
-            if book['id'] in cart_items:
-                book['stock'] = max(0, book['stock'] - cart_items[book['id']])
-        
-        save_json(BOOKS_FILE, books)
+        mode = checkout_queue.mode()
+        if mode == "group":
+            success, message = checkout_queue.get_queue().place(st.session_state.username,
+                                                                 st.session_state.cart, timeout=30)
+            if success:
+                clear_cart()
+            return success, message
+
+        if mode == "queue":
+            ticket = checkout_queue.get_queue().submit(st.session_state.username, st.session_state.cart)
+            if ticket['status'] == checkout_queue.REJECTED:
+                return False, ticket['message']
+            # The cart is kept until the committer places the order (it may still be rejected)
+            st.session_state.pending_orders[ticket['order_id']] = st.session_state.cart.token
+            return True, f"Order #{ticket['order_id']} received! Track it in My Orders."
         
-        clear_cart()
-        return True, f"Order #{order['order_id']} placed successfully!"
+        success, message, order = checkout(st.session_state.username, st.session_state.cart)
+        if success:
+            clear_cart()
+        return success, message
     except Exception as e:
         return False, f"Error placing order: {str(e)}"
 
 # Page functions
+def choose_view(labels, key, label):
+    """Navigation bar over views, remembered in session state; returns the active label
+
+    Unlike st.tabs, which runs every tab's body on each rerun, callers only
+    render the returned view.
+    """
+    if st.session_state.get(key) not in labels:
+        st.session_state[key] = labels[0]
+    return st.radio(label, labels, key=key, horizontal=True, label_visibility="collapsed")
+
+def record_render_time(label, started):
+    """Keep how long a view took to render (shown by benchmarks/bench_views.py)"""
+    st.session_state.render_times[label] = time.perf_counter() - started
+
 def show_login_page():
     """Display sleek and professional login/register page"""
     
     # Custom CSS for professional styling
-    st.markdown("""
-        <style>
-        .main-header {
-            text-align: center;
-            padding: 2rem 0;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border-radius: 10px;
-            margin-bottom: 2rem;
-        }
-        .main-header h1 {
-            font-size: 3rem;
-            margin: 0;
-            font-weight: 700;
-        }
-        .main-header p {
-            font-size: 1.2rem;
-            margin: 0.5rem 0 0 0;
-            opacity: 0.9;
-        }
-        .login-container {
-            max-width: 500px;
-            margin: 0 auto;
-            padding: 2rem;
-            background: white;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }
-        .stButton>button {
-            width: 100%;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            padding: 0.75rem;
-            font-size: 1.1rem;
-            font-weight: 600;
-            border-radius: 5px;
-            margin-top: 1rem;
-        }
-        .stButton>button:hover {
-            background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
-            transform: translateY(-2px);
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-        }
-        .feature-box {
-            background: #f8f9fa;
-            padding: 1.5rem;
-            border-radius: 8px;
-            margin: 1rem 0;
-            border-left: 4px solid #667eea;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(theme.style('login'), unsafe_allow_html=True)
     
     # Header
     st.markdown("""
@@ -387,7 +343,24 @@ def show_login_page():
             st.markdown("<br>", unsafe_allow_html=True)
             st.success("🎉 **Join 1000+ happy readers** who trust BookStore for their reading needs!")
 
-def show_book_catalog():
+def set_catalog_page(page):
+    """Pager callback: runs before the catalog fragment reruns"""
+    st.session_state.catalog_page = page
+
+def show_cart_badge(cart_badge):
+    """Cart summary shown under the header, drawn into its placeholder"""
+    cart = st.session_state.cart
+    if cart.count > 0:
+        cart_badge.markdown(f"""
+            <div class="cart-summary">
+                <span style="font-size: 1.2rem;">🛒 <strong>{cart.count}</strong> items in cart | </span>
+                <span style="font-size: 1.2rem;">💰 Total: <strong>${cart.subtotal:.2f}</strong></span>
+            </div>
+        """, unsafe_allow_html=True)
+    else:
+        cart_badge.empty()
+
+def show_book_catalog(cart_badge):
     """Display professional book catalog with advanced features"""
     
     # Initialize pagination in session state
@@ -396,14 +369,14 @@ def show_book_catalog():
     
     st.markdown("## 📖 Discover Your Next Great Read")
     
-    books = get_books()
+    book_catalog = get_catalog()
     
     # Advanced filters in columns
     col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
     with col1:
-        search_query = st.text_input("🔍 Search by title or author", "", key="search_books")
+        search_query = st.text_input("🔍 Search by title, author or description", "", key="search_books")
     with col2:
-        categories = sorted(list(set([book['category'] for book in books])))
+        categories = book_catalog.categories()
         selected_category = st.selectbox("📚 Category", ["All Categories"] + categories, key="filter_category")
     with col3:
         sort_options = {
@@ -415,32 +388,30 @@ def show_book_catalog():
         }
         sort_selection = st.selectbox("🔄 Sort by", list(sort_options.keys()), key="sort_books")
     with col4:
-        price_filter = st.selectbox("💵 Price Range", ["All Prices", "Under $15", "$15-$20", "Over $20"], key="price_range")
-    
-    # Filter books
-    filtered_books = books
+        price_filter = st.selectbox("💵 Price Range", list(catalog.PRICE_RANGES), key="price_range")
     
-    # Search filter
-    if search_query:
-        filtered_books = [b for b in filtered_books if 
-                         search_query.lower() in b['title'].lower() or 
-                         search_query.lower() in b['author'].lower()]
-    
-    # Category filter
-    if selected_category != "All Categories":
-        filtered_books = [b for b in filtered_books if b['category'] == selected_category]
+    sort_field, reverse = sort_options[sort_selection]
+    show_catalog_page(
+        cart_badge,
+        search=search_query,
+        category=None if selected_category == "All Categories" else selected_category,
+        price_range=price_filter,
+        sort_field=sort_field,
+        reverse=reverse,
+    )
+
+@st.fragment
+def show_catalog_page(cart_badge, **query):
+    """Results grid, pager and cart badge of the catalog
     
-    # Price filter
-    if price_filter == "Under $15":
-        filtered_books = [b for b in filtered_books if b['price'] < 15]
-    elif price_filter == "$15-$20":
-        filtered_books = [b for b in filtered_books if 15 <= b['price'] <= 20]
-    elif price_filter == "Over $20":
-        filtered_books = [b for b in filtered_books if b['price'] > 20]
+    A fragment: "Add to Cart" and the pager rerun only this function, not
+    the page's CSS, header and filters. Changing a filter reruns the app,
+    which calls it again with the new query.
+    """
+    started = time.perf_counter()
     
-    # Sort books
-    sort_field, reverse = sort_options[sort_selection]
-    filtered_books = sorted(filtered_books, key=lambda x: x[sort_field], reverse=reverse)
+    # Filter and sort books (vectorized over the cached columnar catalog)
+    filtered_books = get_catalog().query(**query)
     
     # Show results count
     st.markdown(f"### Found {len(filtered_books)} books")
@@ -457,9 +428,7 @@ def show_book_catalog():
     if st.session_state.catalog_page >= total_pages:
         st.session_state.catalog_page = 0
     
-    start_idx = st.session_state.catalog_page * books_per_page
-    end_idx = min(start_idx + books_per_page, len(filtered_books))
-    current_books = filtered_books[start_idx:end_idx]
+    current_books = filtered_books.page(st.session_state.catalog_page, books_per_page)
     
     # Display books in grid (4 columns)
     cols_per_row = 4
@@ -503,8 +472,8 @@ def show_book_catalog():
                     if book['stock'] > 0:
                         if st.button("🛒 Add to Cart", key=f"add_{book['id']}", use_container_width=True):
                             add_to_cart(book)
+                            show_cart_badge(cart_badge)
                             st.success(f"✅ Added to cart!")
-                            st.rerun()
                     else:
                         st.button("❌ Out of Stock", key=f"oos_{book['id']}", disabled=True, use_container_width=True)
     
@@ -513,32 +482,29 @@ def show_book_catalog():
         st.markdown("<br>", unsafe_allow_html=True)
         col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
         
+        page = st.session_state.catalog_page
+        
         with col1:
-            if st.button("⏮️ First", disabled=(st.session_state.catalog_page == 0)):
-                st.session_state.catalog_page = 0
-                st.rerun()
+            st.button("⏮️ First", disabled=(page == 0), on_click=set_catalog_page, args=(0,))
         
         with col2:
-            if st.button("◀️ Previous", disabled=(st.session_state.catalog_page == 0)):
-                st.session_state.catalog_page -= 1
-                st.rerun()
+            st.button("◀️ Previous", disabled=(page == 0), on_click=set_catalog_page, args=(page - 1,))
         
         with col3:
-            st.markdown(f"<p style='text-align: center; padding-top: 0.5rem;'><strong>Page {st.session_state.catalog_page + 1} of {total_pages}</strong></p>", unsafe_allow_html=True)
+            st.markdown(f"<p style='text-align: center; padding-top: 0.5rem;'><strong>Page {page + 1} of {total_pages}</strong></p>", unsafe_allow_html=True)
         
         with col4:
-            if st.button("Next ▶️", disabled=(st.session_state.catalog_page >= total_pages - 1)):
-                st.session_state.catalog_page += 1
-                st.rerun()
+            st.button("Next ▶️", disabled=(page >= total_pages - 1), on_click=set_catalog_page, args=(page + 1,))
         
         with col5:
-            if st.button("Last ⏭️", disabled=(st.session_state.catalog_page >= total_pages - 1)):
-                st.session_state.catalog_page = total_pages - 1
-                st.rerun()
+            st.button("Last ⏭️", disabled=(page >= total_pages - 1), on_click=set_catalog_page, args=(total_pages - 1,))
+    
+    record_render_time("📖 Catalog page", started)
 
 def show_cart():
     """Display professional shopping cart"""
     st.markdown("## 🛒 Your Shopping Cart")
+    show_checkout_progress()
     
     if not st.session_state.cart:
         st.markdown("""
@@ -549,25 +515,16 @@ def show_cart():
         """, unsafe_allow_html=True)
         return
     
-    # Group items by book id and count quantities
-    cart_items = {}
-    for item in st.session_state.cart:
-        book_id = item['id']
-        if book_id not in cart_items:
-            cart_items[book_id] = {'item': item, 'quantity': 0}
-        cart_items[book_id]['quantity'] += 1
+    cart = st.session_state.cart
     
     # Display cart items in a table-like format
     st.markdown("### Items in your cart")
     
-    total = 0
     items_to_remove = []
     
-    for book_id, data in cart_items.items():
-        item = data['item']
-        quantity = data['quantity']
+    for book_id, item in list(cart.lines.items()):
+        quantity = item['quantity']
         item_total = item['price'] * quantity
-        total += item_total
         
         col1, col2, col3, col4, col5, col6 = st.columns([1, 3, 2, 1, 2, 1])
         
@@ -597,7 +554,8 @@ def show_cart():
     
     # Remove items if needed
     if items_to_remove:
-        st.session_state.cart = [item for item in st.session_state.cart if item['id'] not in items_to_remove]
+        for book_id in items_to_remove:
+            remove_from_cart(book_id)
         st.rerun()
     
     # Cart summary
@@ -612,10 +570,7 @@ def show_cart():
                 <h3 style="margin-top: 0;">Order Summary</h3>
         """, unsafe_allow_html=True)
         
-        subtotal = total
-        tax = total * 0.08  # 8% tax
-        shipping = 5.99 if total < 50 else 0
-        grand_total = subtotal + tax + shipping
+        subtotal, tax, shipping, grand_total = cart.subtotal, cart.tax, cart.shipping, cart.total
         
         st.markdown(f"""
                 <div style="margin: 1rem 0;">
@@ -641,8 +596,8 @@ def show_cart():
             </div>
         """, unsafe_allow_html=True)
         
-        if total < 50:
-            st.info(f"💡 Add ${50 - total:.2f} more for free shipping!")
+        if subtotal < FREE_SHIPPING_THRESHOLD:
+            st.info(f"💡 Add ${FREE_SHIPPING_THRESHOLD - subtotal:.2f} more for free shipping!")
         
         st.markdown("<br>", unsafe_allow_html=True)
         
@@ -662,12 +617,45 @@ def show_cart():
                 else:
                     st.error("❌ " + message)
 
+@st.fragment(run_every=1)
+def show_pending_orders():
+    """Progress of queued checkouts, polled every second until each one is placed or rejected
+
+    A placed order empties the cart it was checked out from, unless the
+    cart has changed since; a rejected one leaves the cart as it was.
+    """
+    finished = False
+    for order_id, token in list(st.session_state.pending_orders.items()):
+        ticket = checkout_queue.get_queue().status(order_id)
+        if ticket is not None and ticket['status'] == checkout_queue.QUEUED:
+            st.info(f"⏳ {ticket['message']}...")
+            continue
+        del st.session_state.pending_orders[order_id]
+        if ticket is not None:
+            st.session_state.order_notices.append(ticket)
+            if ticket['status'] == checkout_queue.PLACED and st.session_state.cart.token == token:
+                clear_cart()
+        finished = True
+    if finished:
+        st.rerun()  # full rerun, so the cart, history and totals reflect the outcome
+
+def show_checkout_progress():
+    """Queued checkouts: report the finished ones, poll the rest"""
+    while st.session_state.order_notices:
+        ticket = st.session_state.order_notices.pop(0)
+        if ticket['status'] == checkout_queue.PLACED:
+            st.success(f"✅ {ticket['message']}")
+        else:
+            st.error(f"❌ Order #{ticket['order_id']} was not placed: {ticket['message']}")
+    if st.session_state.pending_orders:
+        show_pending_orders()
+
 def show_orders():
     """Display user orders with tracking"""
     st.markdown("## 📦 Your Order History")
+    show_checkout_progress()
     
-    orders = load_json(ORDERS_FILE, [])
-    user_orders = [o for o in orders if o['username'] == st.session_state.username]
+    user_orders = storage.get_user_orders(st.session_state.username)
     
     if not user_orders:
         st.markdown("""
@@ -679,16 +667,17 @@ def show_orders():
         return
     
     # Order statistics
+    user_stats = storage.get_order_stats('user', st.session_state.username)
     col1, col2, col3 = st.columns(3)
     with col1:
         st.markdown(f"""
             <div class="metric-card">
-                <h3 style="margin: 0; color: #667eea;">{len(user_orders)}</h3>
+                <h3 style="margin: 0; color: #667eea;">{user_stats.get('orders', 0)}</h3>
                 <p style="margin: 0.5rem 0 0 0; color: #666;">Total Orders</p>
             </div>
         """, unsafe_allow_html=True)
     with col2:
-        total_spent = sum(o['total'] for o in user_orders)
+        total_spent = user_stats.get('spent', 0)
         st.markdown(f"""
             <div class="metric-card">
                 <h3 style="margin: 0; color: #667eea;">${total_spent:.2f}</h3>
@@ -696,7 +685,7 @@ def show_orders():
             </div>
         """, unsafe_allow_html=True)
     with col3:
-        total_items = sum(len(o['items']) for o in user_orders)
+        total_items = user_stats.get('items', 0)
         st.markdown(f"""
             <div class="metric-card">
                 <h3 style="margin: 0; color: #667eea;">{total_items}</h3>
@@ -748,8 +737,8 @@ def show_admin_panel():
     
     # Load data
     books = get_books()
-    orders = load_json(ORDERS_FILE, [])
     users = load_json(USERS_FILE, {})
+    store_stats = storage.get_order_stats('store', 'all')
     
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -765,13 +754,13 @@ def show_admin_panel():
     with col2:
         st.markdown(f"""
             <div class="metric-card" style="background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); color: white;">
-                <h2 style="margin: 0;">{len(orders)}</h2>
+                <h2 style="margin: 0;">{store_stats.get('orders', 0)}</h2>
                 <p style="margin: 0.5rem 0 0 0;">Total Orders</p>
             </div>
         """, unsafe_allow_html=True)
     
     with col3:
-        total_revenue = sum(order['total'] for order in orders)
+        total_revenue = store_stats.get('revenue', 0)
         st.markdown(f"""
             <div class="metric-card" style="background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); color: white;">
                 <h2 style="margin: 0;">${total_revenue:.2f}</h2>
@@ -789,10 +778,12 @@ def show_admin_panel():
     
     st.markdown("<br>", unsafe_allow_html=True)
     
-    # Tab navigation for admin functions
-    admin_tabs = st.tabs(["📚 Manage Books", "📦 View Orders", "📊 Analytics", "👥 Users"])
+    # Navigation for admin functions; only the active section runs
+    admin_view = choose_view(["📚 Manage Books", "📦 View Orders", "📊 Analytics", "👥 Users"],
+                             'admin_view', "Admin navigation")
+    section_started = time.perf_counter()
     
-    with admin_tabs[0]:
+    if admin_view == "📚 Manage Books":
         st.markdown("### 📚 Book Management")
         
         # Add new book
@@ -802,9 +793,7 @@ def show_admin_panel():
                 with col1:
                     title = st.text_input("Title *")
                     author = st.text_input("Author *")
-                    category = st.selectbox("Category *", ["Fiction", "Science Fiction", "Fantasy", 
-                                                           "Mystery", "Romance", "Non-Fiction", 
-                                                           "Biography", "History", "Self-Help", "Children"])
+                    category = st.selectbox("Category *", catalog.BOOK_CATEGORIES)
                 with col2:
                     price = st.number_input("Price ($) *", min_value=0.0, step=0.01, value=14.99)
                     stock = st.number_input("Stock *", min_value=0, step=1, value=50)
@@ -829,6 +818,45 @@ def show_admin_panel():
                         st.success("✅ Book added successfully!")
                         st.rerun()
         
+        # Bulk import / export (streamed, validated, saved in one write)
+        with st.expander("📥 Bulk Import / 📤 Export", expanded='import_report' in st.session_state):
+            import catalog_io  # only the admin needs it; kept out of the app's cold start
+            
+            if 'import_report' in st.session_state:
+                report = st.session_state.pop('import_report')
+                st.success(f"✅ Imported {report['rows']} rows in {report['seconds']:.2f}s "
+                           f"({report['rows_per_second']:,.0f} rows/s): {report['added']} added, "
+                           f"{report['updated']} updated, {report['error_count']} rejected")
+                if report['errors']:
+                    st.dataframe([{'Line': line_num, 'Problem': message} for line_num, message in report['errors']],
+                                 use_container_width=True, hide_index=True)
+            
+            uploaded = st.file_uploader(
+                "Import a CSV or JSONL feed", type=['csv', 'jsonl', 'ndjson'], key="bulk_import_file",
+                help=f"Columns: {', '.join(catalog_io.FIELDS)}. Rows with an existing id update that book; "
+                     f"categories must be one of: {', '.join(catalog.BOOK_CATEGORIES)}.")
+            if uploaded is not None and st.button("📥 Import", key="bulk_import"):
+                try:
+                    st.session_state.import_report = catalog_io.import_books(
+                        catalog_io.open_text(uploaded), catalog_io.detect_format(uploaded.name), cache=get_catalog())
+                    st.rerun()
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+            
+            st.markdown("---")
+            export_format = st.radio("Export format", catalog_io.FORMATS, horizontal=True, key="export_format")
+            if st.button("📤 Prepare export", key="bulk_export"):
+                buffer = io.StringIO()
+                report = catalog_io.export_books(get_books(), buffer, export_format)
+                st.session_state.export_file = (buffer.getvalue().encode('utf-8'), export_format, report)
+            if 'export_file' in st.session_state:
+                data, export_fmt, report = st.session_state.export_file
+                st.caption(f"{report['rows']} books exported in {report['seconds']:.2f}s "
+                           f"({report['rows_per_second']:,.0f} rows/s)")
+                st.download_button(f"⬇️ Download catalog.{export_fmt}", data, file_name=f"catalog.{export_fmt}",
+                                   mime='text/csv' if export_fmt == 'csv' else 'application/x-ndjson',
+                                   on_click=lambda: st.session_state.pop('export_file', None), key="bulk_download")
+        
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown("### Existing Books")
         
@@ -837,61 +865,91 @@ def show_admin_panel():
         with col1:
             search_admin = st.text_input("🔍 Search books", key="admin_search")
         with col2:
-            filter_category = st.selectbox("Filter by category", ["All"] + sorted(list(set([b['category'] for b in books]))), key="admin_filter")
+            filter_category = st.selectbox("Filter by category", ["All"] + get_catalog().categories(), key="admin_filter")
         
-        # Filter books
-        display_books = books
-        if search_admin:
-            display_books = [b for b in display_books if search_admin.lower() in b['title'].lower() or search_admin.lower() in b['author'].lower()]
-        if filter_category != "All":
-            display_books = [b for b in display_books if b['category'] == filter_category]
+        # Filter books through the catalog's indexed query path (catalog order)
+        display_books = get_catalog().query(
+            search=search_admin,
+            category=None if filter_category == "All" else filter_category,
+            sort_field=None,
+        )
+        st.caption(f"{len(display_books)} of {len(books)} books match")
         
-        # Display books
-        for book in display_books:
-            with st.expander(f"{book['image']} {book['title']} by {book['author']} (${book['price']:.2f})"):
-                with st.form(f"edit_book_{book['id']}"):
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        title = st.text_input("Title", value=book['title'], key=f"title_{book['id']}")
-                        author = st.text_input("Author", value=book['author'], key=f"author_{book['id']}")
-                        category = st.selectbox("Category", ["Fiction", "Science Fiction", "Fantasy", 
-                                                             "Mystery", "Romance", "Non-Fiction", 
-                                                             "Biography", "History", "Self-Help", "Children"],
-                                              index=["Fiction", "Science Fiction", "Fantasy", 
-                                                     "Mystery", "Romance", "Non-Fiction", 
-                                                     "Biography", "History", "Self-Help", "Children"].index(book['category']) if book['category'] in ["Fiction", "Science Fiction", "Fantasy", "Mystery", "Romance", "Non-Fiction", "Biography", "History", "Self-Help", "Children"] else 0,
-                                              key=f"cat_{book['id']}")
-                    with col2:
-                        price = st.number_input("Price", value=book['price'], step=0.01, key=f"price_{book['id']}")
-                        stock = st.number_input("Stock", value=book['stock'], step=1, key=f"stock_{book['id']}")
-                        image = st.text_input("Emoji Icon", value=book['image'], key=f"img_{book['id']}")
-                    
-                    description = st.text_area("Description", value=book['description'], key=f"desc_{book['id']}")
-                    
-                    col_a, col_b, col_c = st.columns(3)
-                    with col_a:
-                        if st.form_submit_button("💾 Update", use_container_width=True):
-                            book_data = {
-                                'title': title,
-                                'author': author,
-                                'price': price,
-                                'category': category,
-                                'description': description,
-                                'stock': stock,
-                                'image': image
-                            }
-                            update_book(book['id'], book_data)
-                            st.success("✅ Book updated!")
-                            st.rerun()
-                    with col_b:
-                        pass
-                    with col_c:
-                        if st.form_submit_button("🗑️ Delete", use_container_width=True, type="secondary"):
-                            delete_book(book['id'])
-                            st.success("✅ Book deleted!")
-                            st.rerun()
+        # Pagination (back to the first page whenever the filters change)
+        admin_books_per_page = 20
+        admin_filter_key = (search_admin, filter_category)
+        if st.session_state.get('admin_books_filter') != admin_filter_key:
+            st.session_state.admin_books_filter = admin_filter_key
+            st.session_state.admin_books_page = 0
+        admin_total_pages = max(1, (len(display_books) + admin_books_per_page - 1) // admin_books_per_page)
+        admin_page = min(st.session_state.get('admin_books_page', 0), admin_total_pages - 1)
+        page_books = display_books.page(admin_page, admin_books_per_page)
+        
+        if page_books:
+            st.dataframe([{'ID': b['id'], 'Title': b['title'], 'Author': b['author'], 'Category': b['category'],
+                           'Price': f"${b['price']:.2f}", 'Stock': b['stock']} for b in page_books],
+                         use_container_width=True, hide_index=True)
+        
+        if admin_total_pages > 1:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("⬅️ Previous", disabled=admin_page == 0, key="admin_books_prev"):
+                    st.session_state.admin_books_page = admin_page - 1
+                    st.rerun()
+            with col2:
+                st.markdown(f"<div style='text-align: center;'>Page {admin_page + 1} of {admin_total_pages}</div>",
+                            unsafe_allow_html=True)
+            with col3:
+                if st.button("Next ➡️", disabled=admin_page >= admin_total_pages - 1, key="admin_books_next"):
+                    st.session_state.admin_books_page = admin_page + 1
+                    st.rerun()
+        
+        # A single edit form, for the one book being edited
+        if page_books:
+            page_by_label = {f"#{b['id']} {b['title']}": b for b in page_books}
+            book = page_by_label[st.selectbox("✏️ Edit book", list(page_by_label), key="admin_edit_book")]
+            with st.form("edit_book_form"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    title = st.text_input("Title", value=book['title'], key=f"title_{book['id']}")
+                    author = st.text_input("Author", value=book['author'], key=f"author_{book['id']}")
+                    category = st.selectbox("Category", catalog.BOOK_CATEGORIES,
+                                          index=catalog.BOOK_CATEGORIES.index(book['category']) if book['category'] in catalog.BOOK_CATEGORIES else 0,
+                                          key=f"cat_{book['id']}")
+                with col2:
+                    price = st.number_input("Price", value=book['price'], step=0.01, key=f"price_{book['id']}")
+                    stock = st.number_input("Stock", value=book['stock'], step=1, key=f"stock_{book['id']}")
+                    image = st.text_input("Emoji Icon", value=book['image'], key=f"img_{book['id']}")
+                
+                description = st.text_area("Description", value=book['description'], key=f"desc_{book['id']}")
+                
+                col_a, col_b, col_c = st.columns(3)
+                with col_a:
+                    if st.form_submit_button("💾 Update", use_container_width=True):
+                        book_data = {
+                            'title': title,
+                            'author': author,
+                            'price': price,
+                            'category': category,
+                            'description': description,
+                            'stock': stock,
+                            'image': image
+                        }
+                        update_book(book['id'], book_data)
+                        st.success("✅ Book updated!")
+                        st.rerun()
+                with col_b:
+                    pass
+                with col_c:
+                    if st.form_submit_button("🗑️ Delete", use_container_width=True, type="secondary"):
+                        delete_book(book['id'])
+                        st.success("✅ Book deleted!")
+                        st.rerun()
+        else:
+            st.info("No books match your search.")
     
-    with admin_tabs[1]:
+    if admin_view == "📦 View Orders":
+        orders = load_json(ORDERS_FILE, [])
         st.markdown("### 📦 All Orders")
         
         if not orders:
@@ -900,7 +958,7 @@ def show_admin_panel():
             # Order filters
             col1, col2 = st.columns(2)
             with col1:
-                status_filter = st.selectbox("Filter by status", ["All", "Pending", "Processing", "Shipped", "Delivered", "Cancelled"])
+                status_filter = st.selectbox("Filter by status", ["All"] + ORDER_STATUSES)
             with col2:
                 sort_orders = st.selectbox("Sort by", ["Newest First", "Oldest First", "Highest Value", "Lowest Value"])
             
@@ -918,6 +976,32 @@ def show_admin_panel():
             else:
                 display_orders = sorted(display_orders, key=lambda x: x['total'])
             
+            # Bulk status update: one storage transaction for the whole set
+            with st.expander("⚡ Bulk Status Update", expanded='bulk_report' in st.session_state):
+                if 'bulk_report' in st.session_state:
+                    report = st.session_state.pop('bulk_report')
+                    updated = sum(1 for _, success, _ in report if success)
+                    if updated:
+                        st.success(f"✅ Updated {updated} of {len(report)} orders")
+                    if updated < len(report):
+                        st.warning(f"⚠️ {len(report) - updated} orders were not updated")
+                    st.dataframe([{'Order': f"#{order_id}", 'Result': '✅' if success else '❌', 'Details': message}
+                                  for order_id, success, message in report], use_container_width=True)
+                
+                scope = st.radio("Apply to", ["All orders matching the filter", "Selected orders"],
+                                 horizontal=True, key="bulk_scope")
+                if scope == "Selected orders":
+                    bulk_ids = st.multiselect("Orders", [o['order_id'] for o in display_orders],
+                                              format_func=lambda order_id: f"#{order_id}", key="bulk_orders")
+                else:
+                    bulk_ids = [o['order_id'] for o in display_orders]
+                bulk_status = st.selectbox("New status", ORDER_STATUSES, key="bulk_status")
+                
+                if st.button(f"Move {len(bulk_ids)} orders to {bulk_status}", disabled=not bulk_ids, key="bulk_apply"):
+                    st.session_state.bulk_report = bulk_update_status(
+                        bulk_ids, bulk_status, expected_status=None if status_filter == "All" else status_filter)
+                    st.rerun()
+            
             for order in display_orders:
                 status_color = {
                     'Pending': '#ffc107',
@@ -947,52 +1031,77 @@ def show_admin_panel():
                     
                     with col2:
                         st.write("**Update Status:**")
-                        new_status = st.selectbox("", ["Pending", "Processing", "Shipped", "Delivered", "Cancelled"],
-                                                 index=["Pending", "Processing", "Shipped", "Delivered", "Cancelled"].index(order['status']),
+                        new_status = st.selectbox("", ORDER_STATUSES,
+                                                 index=ORDER_STATUSES.index(order['status']),
                                                  key=f"status_{order['order_id']}")
                         
                         if st.button("Update", key=f"update_{order['order_id']}"):
-                            orders_list = load_json(ORDERS_FILE, [])
-                            for o in orders_list:
-                                if o['order_id'] == order['order_id']:
-                                    o['status'] = new_status
-                            save_json(ORDERS_FILE, orders_list)
-                            st.success("✅ Status updated!")
-                            st.rerun()
+                            if storage.set_order_status(order['order_id'], new_status):
+                                st.success("✅ Status updated!")
+                                st.rerun()
+                            else:
+                                st.error(f"❌ Order #{order['order_id']} no longer exists")
     
-    with admin_tabs[2]:
+    if admin_view == "📊 Analytics":
         st.markdown("### 📊 Analytics & Insights")
         
-        if orders:
-            # Revenue over time (simplified)
-            col1, col2 = st.columns(2)
+        if store_stats.get('orders'):
+            # Revenue over time, from the hourly/daily/monthly rollups
+            st.markdown("#### 📈 Revenue Over Time")
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                today = datetime.now().date()
+                date_range = st.date_input("Date range", (today - timedelta(days=29), today),
+                                           max_value=today, key="revenue_range")
+            with col2:
+                granularity = st.selectbox("Granularity", ["Daily", "Hourly", "Monthly"], key="revenue_granularity")
+            
+            if not isinstance(date_range, (tuple, list)) or len(date_range) != 2:
+                st.info("Pick an end date to see the chart.")
+            elif granularity == "Hourly" and (date_range[1] - date_range[0]).days >= 31:
+                st.info("Hourly charts cover at most 31 days; pick a shorter range or Daily.")
+            else:
+                rollup = granularity.lower()
+                keys = stats.rollup_keys(rollup, *date_range)
+                records = storage.get_order_stats_range(rollup, keys[0], keys[-1])
+                revenue = stats.series(records, keys, 'revenue')
+                units = stats.series(records, keys, 'units')
+                st.caption(f"${sum(revenue.values()):.2f} revenue and {sum(units.values())} books sold "
+                           f"from {date_range[0]} to {date_range[1]}")
+                chart_col1, chart_col2 = st.columns(2)
+                with chart_col1:
+                    st.line_chart({'Revenue ($)': revenue})
+                with chart_col2:
+                    st.bar_chart({'Units sold': units})
+            
+            st.markdown("<br>", unsafe_allow_html=True)
+            col1, col2, col3 = st.columns(3)
             
             with col1:
                 st.markdown("#### 📈 Category Distribution")
-                category_counts = {}
-                for book in books:
-                    category_counts[book['category']] = category_counts.get(book['category'], 0) + 1
+                category_counts = get_catalog().category_counts()
                 
                 if category_counts:
                     st.bar_chart(category_counts)
             
             with col2:
                 st.markdown("#### 💰 Top Selling Categories")
-                category_revenue = {}
-                for order in orders:
-                    for item in order['items']:
-                        cat = item.get('category', 'Unknown')
-                        category_revenue[cat] = category_revenue.get(cat, 0) + item['price']
-                
-                if category_revenue:
-                    sorted_revenue = dict(sorted(category_revenue.items(), key=lambda x: x[1], reverse=True))
-                    for cat, rev in list(sorted_revenue.items())[:5]:
-                        st.write(f"**{cat}:** ${rev:.2f}")
+                category_sales = storage.get_order_stats('category')
+                for cat, sales in stats.top(category_sales, 'revenue', 5):
+                    st.write(f"**{cat}:** ${sales['revenue']:.2f}")
+            
+            with col3:
+                st.markdown("#### 📚 Top Selling Books")
+                book_sales = storage.get_order_stats('book')
+                for book_id, sales in stats.top(book_sales, 'units', 5):
+                    book = get_catalog().get_book(book_id)
+                    title = book['title'] if book else f"Book #{book_id}"
+                    st.write(f"**{title}:** {sales['units']} sold")
             
             # Inventory alerts
             st.markdown("<br>", unsafe_allow_html=True)
             st.markdown("#### ⚠️ Inventory Alerts")
-            low_stock = [b for b in books if b['stock'] < 20]
+            low_stock = get_catalog().low_stock()
             if low_stock:
                 for book in low_stock:
                     st.warning(f"📚 **{book['title']}** - Only {book['stock']} left in stock")
@@ -1002,27 +1111,33 @@ def show_admin_panel():
         else:
             st.info("No data available yet. Analytics will appear once orders are placed.")
     
-    with admin_tabs[3]:
+    if admin_view == "👥 Users":
         st.markdown("### 👥 User Management")
         
         st.write(f"**Total Registered Users:** {len(users)}")
         
+        all_user_stats = storage.get_order_stats('user')
         for username, data in users.items():
             with st.expander(f"👤 {username} {'🔑 (Admin)' if data.get('is_admin', False) else ''}"):
                 st.write(f"**Email:** {data.get('email', 'N/A')}")
                 st.write(f"**Account Type:** {'Administrator' if data.get('is_admin', False) else 'Customer'}")
                 
                 # User's order history
-                user_orders = [o for o in orders if o['username'] == username]
-                st.write(f"**Total Orders:** {len(user_orders)}")
-                if user_orders:
-                    total_spent = sum(o['total'] for o in user_orders)
-                    st.write(f"**Total Spent:** ${total_spent:.2f}")
+                user_stats = all_user_stats.get(username, {})
+                st.write(f"**Total Orders:** {user_stats.get('orders', 0)}")
+                if user_stats.get('orders'):
+                    st.write(f"**Total Spent:** ${user_stats.get('spent', 0):.2f}")
+    
+    record_render_time(admin_view, section_started)
+
+# Top-level view labels; only the active view runs on a rerun
+VIEWS = ["📖 Browse Books", "🛒 Shopping Cart", "📦 My Orders", "⚙️ Admin Panel"]
+ADMIN_VIEWS = {"⚙️ Admin Panel"}
 
 # Main app
 def main():
-    # Initialize data
-    initialize_data()
+    # Initialize data (once per server process; later runs only check the ready marker)
+    storage.bootstrap(initialize_data)
     
     # Show login page if not logged in
     if not st.session_state.logged_in:
@@ -1030,53 +1145,7 @@ def main():
         return
     
     # Custom CSS for professional styling
-    st.markdown("""
-        <style>
-        .header-container {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 1.5rem;
-            border-radius: 10px;
-            margin-bottom: 1rem;
-            color: white;
-        }
-        .user-info {
-            background: rgba(255, 255, 255, 0.2);
-            padding: 0.5rem 1rem;
-            border-radius: 5px;
-            display: inline-block;
-        }
-        .cart-summary {
-            background: #f8f9fa;
-            padding: 1rem;
-            border-radius: 8px;
-            border-left: 4px solid #667eea;
-            margin: 1rem 0;
-        }
-        .stTabs [data-baseweb="tab-list"] {
-            gap: 2rem;
-            background-color: #f8f9fa;
-            padding: 0.5rem 1rem;
-            border-radius: 10px;
-        }
-        .stTabs [data-baseweb="tab"] {
-            padding: 1rem 2rem;
-            font-weight: 600;
-            font-size: 1.1rem;
-        }
-        .stTabs [aria-selected="true"] {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white !important;
-            border-radius: 5px;
-        }
-        .metric-card {
-            background: white;
-            padding: 1.5rem;
-            border-radius: 8px;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-            text-align: center;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(theme.style('app'), unsafe_allow_html=True)
     
     # Header with user info
     col1, col2, col3 = st.columns([2, 2, 1])
@@ -1101,44 +1170,22 @@ def main():
             logout_user()
             st.rerun()
     
-    # Cart summary at top
-    cart_count = len(st.session_state.cart)
-    cart_total = sum(item['price'] for item in st.session_state.cart)
-    
-    if cart_count > 0:
-        st.markdown(f"""
-            <div class="cart-summary">
-                <span style="font-size: 1.2rem;">🛒 <strong>{cart_count}</strong> items in cart | </span>
-                <span style="font-size: 1.2rem;">💰 Total: <strong>${cart_total:.2f}</strong></span>
-            </div>
-        """, unsafe_allow_html=True)
+    # Cart summary at top (redrawn in place by the catalog fragment)
+    cart_badge = st.empty()
+    show_cart_badge(cart_badge)
     
-    # Tab-based navigation
-    if st.session_state.is_admin:
-        tabs = st.tabs(["📖 Browse Books", "🛒 Shopping Cart", "📦 My Orders", "⚙️ Admin Panel"])
-        
-        with tabs[0]:
-            show_book_catalog()
-        
-        with tabs[1]:
-            show_cart()
-        
-        with tabs[2]:
-            show_orders()
-        
-        with tabs[3]:
-            show_admin_panel()
-    else:
-        tabs = st.tabs(["📖 Browse Books", "🛒 Shopping Cart", "📦 My Orders"])
-        
-        with tabs[0]:
-            show_book_catalog()
-        
-        with tabs[1]:
-            show_cart()
-        
-        with tabs[2]:
-            show_orders()
+    # View navigation: only the active view's code runs on a rerun
+    labels = [label for label in VIEWS if st.session_state.is_admin or label not in ADMIN_VIEWS]
+    view = choose_view(labels, 'active_view', "Navigation")
+    show_view = {
+        "📖 Browse Books": lambda: show_book_catalog(cart_badge),
+        "🛒 Shopping Cart": show_cart,
+        "📦 My Orders": show_orders,
+        "⚙️ Admin Panel": show_admin_panel,
+    }[view]
+    started = time.perf_counter()
+    show_view()
+    record_render_time(view, started)
 
 if __name__ == "__main__":
     main()
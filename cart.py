@@ -0,0 +1,68 @@
+"""
+Shopping cart kept in each session.
+
+A cart maps book id -> line: the quantity plus a snapshot of the price and
+display fields taken when the book was first added. Running totals are
+updated on every change, so the header, the cart page and checkout never
+rescan the cart.
+
+Every version of the cart's contents carries a fresh checkout token. The
+order placed for a cart stores its token, so checking out the same cart
+again (a double click, a rerun after a reconnect) finds that order
+instead of placing a second one.
+"""
+
+import uuid
+
+from orders import calculate_totals
+
+# Book fields snapshotted into a cart line
+LINE_FIELDS = ('title', 'author', 'category', 'image', 'price')
+
+
+class Cart:
+    """Quantity map of books with running subtotal, tax, shipping and total"""
+
+    def __init__(self):
+        self.lines = {}  # book id -> {'quantity': n, 'title': ..., 'price': ...}
+        self.count = 0
+        self.subtotal = 0.0
+        self.tax, self.shipping, self.total = calculate_totals(0.0)
+        self.token = uuid.uuid4().hex  # checkout idempotency token, new on every change
+
+    def __len__(self):
+        """Number of copies in the cart"""
+        return self.count
+
+    def _adjust(self, quantity, price):
+        self.count += quantity
+        self.subtotal = round(self.subtotal + quantity * price, 2)
+        self.tax, self.shipping, self.total = calculate_totals(self.subtotal)
+        self.token = uuid.uuid4().hex
+
+    def add(self, book, quantity=1):
+        """Add copies of a book (the price is the one seen when first added)"""
+        line = self.lines.get(book['id'])
+        if line is None:
+            line = self.lines[book['id']] = {field: book[field] for field in LINE_FIELDS}
+            line['quantity'] = 0
+        line['quantity'] += quantity
+        self._adjust(quantity, line['price'])
+
+    def remove(self, book_id):
+        """Remove every copy of a book"""
+        line = self.lines.pop(book_id, None)
+        if line is not None:
+            self._adjust(-line['quantity'], line['price'])
+
+    def clear(self):
+        self.__init__()
+
+    def order_items(self):
+        """Cart contents as order items, one entry per copy (the order history format)"""
+        items = []
+        for book_id, line in self.lines.items():
+            item = {'id': book_id}
+            item.update((field, line[field]) for field in LINE_FIELDS)
+            items.extend(dict(item) for _ in range(line['quantity']))
+        return items
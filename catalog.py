@@ -0,0 +1,491 @@
+"""
+Shared catalog cache for the BookStore app.
+
+Streamlit re-executes the app script on every interaction, but imported
+modules stay loaded for the life of the server process, so state kept here
+is shared by every session.
+
+Catalog queries (filter by category and price range, sort, paginate) run
+on a columnar NumPy copy of the catalog built once per catalog version,
+and their sorted id lists are kept in a small LRU so paging is a slice.
+"""
+
+import bisect
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+import numpy as np
+
+from settings import get_setting
+
+_MISSING = object()
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Book fields covered by catalog search
+SEARCH_FIELDS = ('title', 'author', 'description')
+
+# Price range filters offered in the catalog (work on floats and NumPy arrays)
+PRICE_RANGES = {
+    "All Prices": None,
+    "Under $15": lambda price: price < 15,
+    "$15-$20": lambda price: (price >= 15) & (price <= 20),
+    "Over $20": lambda price: price > 20,
+}
+
+# Book fields the catalog can be sorted by
+SORT_FIELDS = ('title', 'author', 'price')
+
+# Categories offered by the admin book forms (and accepted by bulk import)
+BOOK_CATEGORIES = ["Fiction", "Science Fiction", "Fantasy", "Mystery", "Romance",
+                   "Non-Fiction", "Biography", "History", "Self-Help", "Children"]
+
+# Books with less stock than this are flagged in the admin dashboard
+LOW_STOCK_THRESHOLD = 20
+
+# Pages within this fraction of a result are served from a partial sort;
+# asking for anything past it sorts the whole result once
+PARTIAL_SORT_FRACTION = 0.25
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """Inverted token index with prefix lookup over title, author and description
+
+    A query matches books that contain, for every query word, some token
+    starting with that word ("harry pot" finds "Harry Potter ..."). Lookups
+    cost roughly the number of matching tokens and books, not the catalog size.
+    """
+
+    def __init__(self, books=()):
+        self._postings = {}     # token -> set of book ids
+        self._tokens = []       # sorted tokens, for prefix ranges
+        self._book_tokens = {}  # book id -> its tokens, for removal
+        for book in books:
+            for token in self._book_tokens_of(book):
+                self._postings.setdefault(token, set()).add(book['id'])
+        # One sort for the bulk build; insort per new token would be quadratic
+        self._tokens = sorted(self._postings)
+
+    def _book_tokens_of(self, book):
+        """Tokenize a book's searchable fields and remember them for removal"""
+        tokens = set()
+        for field in SEARCH_FIELDS:
+            tokens.update(tokenize(str(book.get(field, ''))))
+        self._book_tokens[book['id']] = tokens
+        return tokens
+
+    def add(self, book):
+        """Index one book"""
+        for token in self._book_tokens_of(book):
+            ids = self._postings.get(token)
+            if ids is None:
+                self._postings[token] = ids = set()
+                bisect.insort(self._tokens, token)
+            ids.add(book['id'])
+
+    def remove(self, book_id):
+        """Drop one book from the index"""
+        for token in self._book_tokens.pop(book_id, ()):
+            ids = self._postings[token]
+            ids.discard(book_id)
+            if not ids:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+
+    def _prefix_matches(self, prefix):
+        """Ids of books having any token that starts with prefix"""
+        start = bisect.bisect_left(self._tokens, prefix)
+        end = bisect.bisect_left(self._tokens, prefix + '\U0010ffff')
+        if end - start == 1:
+            return self._postings[self._tokens[start]]
+        ids = set()
+        for token in self._tokens[start:end]:
+            ids |= self._postings[token]
+        return ids
+
+    def search(self, query):
+        """Return the set of book ids matching every word of the query"""
+        words = tokenize(query)
+        if not words:
+            return set()
+        matches = sorted((self._prefix_matches(word) for word in set(words)), key=len)
+        result = set(matches[0])
+        for ids in matches[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+
+class CatalogFrame:
+    """Columnar copy of the catalog for vectorized filtering and sorting
+
+    Sorting uses dense ranks of each field and a stable argsort, which
+    gives exactly the order of sorted(books, key=..., reverse=...),
+    ties included.
+    """
+
+    def __init__(self, books):
+        self._books = books
+        self.size = len(books)
+        self.ids = np.fromiter((b['id'] for b in books), dtype=np.int64, count=self.size)
+        self.price = np.fromiter((b['price'] for b in books), dtype=np.float64, count=self.size)
+        self.categories, self.category_codes = self._dense_rank([b['category'] for b in books])
+        counts = np.bincount(self.category_codes, minlength=len(self.categories))
+        self.category_counts = dict(zip(self.categories, counts.tolist()))
+        self._ranks = {'price': np.unique(self.price, return_inverse=True)[1]}
+
+    @staticmethod
+    def _dense_rank(values):
+        """Return (sorted unique values, rank of each value)"""
+        unique = sorted(set(values))
+        code = {value: i for i, value in enumerate(unique)}
+        return unique, np.fromiter((code[v] for v in values), dtype=np.intp, count=len(values))
+
+    def rank(self, field):
+        """Dense rank of every book by a sort field (built on first use)"""
+        if field not in self._ranks:
+            self._ranks[field] = self._dense_rank([b[field] for b in self._books])[1]
+        return self._ranks[field]
+
+    def filter(self, ids=None, category=None, price_range=None):
+        """Positions of the books passing every given filter, in catalog order"""
+        mask = np.ones(self.size, dtype=bool)
+        if ids is not None:
+            mask &= np.isin(self.ids, np.fromiter(ids, dtype=np.int64, count=len(ids)))
+        if category is not None:
+            code = bisect.bisect_left(self.categories, category)
+            if code == len(self.categories) or self.categories[code] != category:
+                return np.empty(0, dtype=np.intp)
+            mask &= self.category_codes == code
+        if PRICE_RANGES.get(price_range) is not None:
+            mask &= PRICE_RANGES[price_range](self.price)
+        return np.flatnonzero(mask)
+
+    def sort(self, positions, field, reverse=False):
+        """Order positions by a field like sorted(): stable, ties in catalog order
+
+        field None keeps catalog order.
+        """
+        if field is None:
+            return positions
+        ranks = self.rank(field)[positions]
+        return positions[np.argsort(-ranks if reverse else ranks, kind='stable')]
+
+    def top(self, positions, field, reverse, k):
+        """The first k positions of sort(positions, field, reverse)
+
+        Selects the k smallest (rank, catalog position) keys with
+        argpartition and sorts only those, so ties come out exactly as in
+        a full stable sort.
+        """
+        n = len(positions)
+        if field is None or k >= n * PARTIAL_SORT_FRACTION:
+            return self.sort(positions, field, reverse)[:k]
+        ranks = self.rank(field)[positions].astype(np.int64)
+        if reverse:
+            ranks = ranks.max() - ranks
+        keys = ranks * n + np.arange(n)
+        first = np.argpartition(keys, k - 1)[:k]
+        return positions[first[np.argsort(keys[first])]]
+
+
+class QueryCache:
+    """Bounded LRU of catalog query results with an optional time-to-live
+
+    maxsize <= 0 disables caching; ttl of None or 0 keeps entries until
+    they are evicted or the cache is cleared.
+    """
+
+    def __init__(self, maxsize=128, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (value, time stored)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and self._clock() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries if full"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CatalogResult:
+    """A filtered catalog query that hands out one sorted page at a time
+
+    Only as much of the result is sorted as the pages asked for need:
+    early pages come from a partial sort of the first few pages (grown by
+    doubling), and the full order is built once, then kept, when someone
+    jumps to the last or a deep page.
+    """
+
+    def __init__(self, cache, frame, positions, sort_field, reverse):
+        self._cache = cache
+        self._frame = frame
+        self._positions = positions
+        self._sort_field = sort_field
+        self._reverse = reverse
+        self._lock = threading.Lock()
+        self._sorted_ids = np.empty(0, dtype=np.int64)  # ids of the sorted prefix
+
+    def __len__(self):
+        return len(self._positions)
+
+    @property
+    def ids(self):
+        """All matching ids, sorted"""
+        return self._prefix(len(self))
+
+    def _prefix(self, k):
+        with self._lock:
+            if len(self._sorted_ids) < min(k, len(self)):
+                k = min(max(k, 2 * len(self._sorted_ids)), len(self))
+                positions = self._frame.top(self._positions, self._sort_field, self._reverse, k)
+                self._sorted_ids = self._frame.ids[positions]
+                self._sorted_ids.flags.writeable = False  # shared by every session
+            return self._sorted_ids
+
+    def page(self, page, per_page):
+        """Books on a zero-based page"""
+        by_id = self._cache._by_id
+        start = page * per_page
+        ids = self._prefix(start + per_page)[start:start + per_page]
+        return [by_id[book_id] for book_id in ids.tolist() if book_id in by_id]
+
+
+class CatalogCache:
+    """Process-wide cache of the book catalog, shared by all sessions
+
+    Stock levels change on every checkout, so they are tracked separately:
+    a stock-only change re-applies the counters without reloading the
+    catalog itself. The search index is built once per load and patched
+    in place by update(). Query results are cached per content version;
+    stock-only changes keep them, since no query filters or sorts on stock.
+    """
+
+    def __init__(self, loader, signature, stock_loader=None, stock_signature=None, query_cache=None):
+        self._loader = loader
+        self._signature_of = signature
+        self._stock_loader = stock_loader
+        self._stock_signature_of = stock_signature or (lambda: None)
+        self._lock = threading.Lock()
+        self._signature = _MISSING
+        self._stock_signature = _MISSING
+        self._books = ()
+        self._by_id = {}
+        self._position = {}
+        self._index = SearchIndex()
+        self._low_stock = {}    # book id -> view, for books below LOW_STOCK_THRESHOLD
+        self._frame = None
+        self._queries = query_cache if query_cache is not None else QueryCache()
+        self.version = 0
+        self.content_version = 0
+
+    def get(self):
+        """Return the catalog as a tuple of read-only book views"""
+        stock_signature = self._stock_signature_of()
+        signature = self._signature_of()
+        if signature == self._signature and stock_signature == self._stock_signature:
+            return self._books
+
+        with self._lock:
+            if signature != self._signature:
+                # The loader already includes current stock levels
+                books = tuple(MappingProxyType(dict(b)) for b in self._loader())
+                self._index = SearchIndex(books)
+                self._low_stock = {}
+                for book in books:
+                    self._track_stock(book)
+                self._set_books(books)
+                self._signature = signature
+                self._stock_signature = stock_signature
+            elif stock_signature != self._stock_signature:
+                self._apply_stock(self._stock_loader())
+                self._stock_signature = stock_signature
+            return self._books
+
+    def _set_books(self, books, content_changed=True):
+        self._books = books
+        self._by_id = {b['id']: b for b in books}
+        self._position = {b['id']: i for i, b in enumerate(books)}
+        if content_changed:
+            self._frame = None
+            self._queries.clear()
+            self.content_version += 1
+        self.version += 1
+
+    def _apply_stock(self, stock):
+        """Swap in new views for the books whose stock level changed"""
+        books = list(self._books)
+        for i, book in enumerate(books):
+            if book['id'] in stock and stock[book['id']] != book['stock']:
+                books[i] = MappingProxyType(dict(book, stock=stock[book['id']]))
+                self._track_stock(books[i])
+        self._set_books(tuple(books), content_changed=False)
+
+    def _track_stock(self, book):
+        """Keep the low-stock set current for one (new or changed) book"""
+        if book['stock'] < LOW_STOCK_THRESHOLD:
+            self._low_stock[book['id']] = book
+        else:
+            self._low_stock.pop(book['id'], None)
+
+    def get_book(self, book_id):
+        """Return a single read-only book view by id, or None"""
+        self.get()
+        return self._by_id.get(book_id)
+
+    def frame(self):
+        """Columnar copy of the catalog, rebuilt only when book data changes"""
+        return self._versioned_frame()[1]
+
+    def _versioned_frame(self):
+        self.get()
+        with self._lock:
+            if self._frame is None:
+                self._frame = CatalogFrame(self._books)
+            return self.content_version, self._frame
+
+    def categories(self):
+        """Sorted list of categories present in the catalog"""
+        return self.frame().categories
+
+    def category_counts(self):
+        """{category: number of books}, counted once per catalog version"""
+        return self.frame().category_counts
+
+    def low_stock(self):
+        """Books below LOW_STOCK_THRESHOLD, in catalog order"""
+        self.get()
+        with self._lock:
+            return sorted(self._low_stock.values(), key=lambda b: self._position[b['id']])
+
+    def query(self, search=None, category=None, price_range=None, sort_field='title', reverse=False):
+        """Filter and sort the catalog; returns a CatalogResult to page through
+
+        sort_field None keeps catalog order.
+
+        Results are cached by the query and the catalog content version,
+        together with however much of their order has been sorted, so
+        paging through a view already asked for is a slice.
+        """
+        version, frame = self._versioned_frame()
+        words = tuple(sorted(set(tokenize(search)))) if search else None
+        key = (version, words, category, price_range, sort_field, reverse)
+        result = self._queries.get(key)
+        if result is None:
+            matches = self._index_ids(search) if search else None
+            positions = frame.filter(matches, category, price_range)
+            result = CatalogResult(self, frame, positions, sort_field, reverse)
+            self._queries.put(key, result)
+        return result
+
+    def _index_ids(self, query):
+        with self._lock:
+            return self._index.search(query)
+
+    def update(self, write, upserts=(), deletes=()):
+        """Run write() and patch the cache with its effect instead of reloading
+
+        upserts are the saved book dicts (including stock), deletes the
+        removed ids. Callers must hold the storage write lock so no other
+        writer can slip in between write() and re-reading the signatures.
+        """
+        with self._lock:
+            current = (self._signature == self._signature_of()
+                       and self._stock_signature == self._stock_signature_of())
+            write()
+            if not current:
+                self._signature = _MISSING
+                return
+
+            books = list(self._books)
+            removed = set(deletes)
+            for book_id in removed:
+                self._index.remove(book_id)
+                self._low_stock.pop(book_id, None)
+            if removed:
+                books = [b for b in books if b['id'] not in removed]
+            position = {b['id']: i for i, b in enumerate(books)} if removed else dict(self._position)
+            for book in upserts:
+                view = MappingProxyType(dict(book))
+                self._index.remove(book['id'])
+                self._index.add(view)
+                self._track_stock(view)
+                if book['id'] in position:
+                    books[position[book['id']]] = view
+                else:
+                    position[book['id']] = len(books)
+                    books.append(view)
+            self._set_books(tuple(books))
+            self._signature = self._signature_of()
+            self._stock_signature = self._stock_signature_of()
+
+    def invalidate(self):
+        """Force the next get() to reload from disk"""
+        with self._lock:
+            self._signature = _MISSING
+            self._stock_signature = _MISSING
+            self._queries.clear()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name, loader, signature, stock_loader=None, stock_signature=None):
+    """Return the shared cache for a catalog, creating it on first use
+
+    loader() returns the list of book dicts; signature() returns a cheap
+    token that changes whenever the stored catalog does. stock_loader()
+    and stock_signature() do the same for the {book_id: stock} counters.
+    Query result caching is configured by query_cache_size and
+    query_cache_ttl (seconds) under [catalog] in config.toml.
+    """
+    key = os.path.abspath(name)
+    cache = _caches.get(key)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(key)
+            if cache is None:
+                queries = QueryCache(get_setting('catalog', 'query_cache_size', 128),
+                                     get_setting('catalog', 'query_cache_ttl', 300))
+                cache = _caches[key] = CatalogCache(loader, signature, stock_loader, stock_signature, queries)
+    return cache
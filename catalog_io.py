@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Bulk catalog import and export (CSV or JSON lines).
+
+Imports stream the feed row by row, validate each row (categories must be
+one of catalog.BOOK_CATEGORIES), merge valid rows into the catalog and
+save the result in a single write. Rows with the id of an
+existing book update it; rows without an id (or with a new one) add a
+book. Exports stream the catalog out one row at a time.
+
+    python catalog_io.py import supplier_feed.csv
+    python catalog_io.py export catalog.jsonl
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+import storage
+from catalog import BOOK_CATEGORIES
+from storage import BOOKS_FILE, load_json, save_json
+
+FORMATS = ('csv', 'jsonl')
+
+# Columns of an exported catalog (and accepted by import)
+FIELDS = ('id', 'title', 'author', 'price', 'category', 'stock', 'description', 'image')
+
+# Row errors kept in a report (all of them are counted)
+MAX_ERRORS = 100
+
+DEFAULT_IMAGE = '📖'
+
+
+def detect_format(filename):
+    """Guess the feed format from a file name ('csv' or 'jsonl')"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    raise ValueError(f"Unsupported file type '{extension}' (expected .csv or .jsonl)")
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict or None) from a text stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_num, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_num, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f"Unknown format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+
+
+def validate_row(row):
+    """Turn a feed row into a book dict; raises ValueError describing the problem"""
+    if row is None:
+        raise ValueError("not a valid record")
+    book = {}
+    for field in ('title', 'author'):
+        value = str(row.get(field) or '').strip()
+        if not value:
+            raise ValueError(f"missing {field}")
+        book[field] = value
+
+    category = str(row.get('category') or '').strip()
+    if category not in BOOK_CATEGORIES:
+        raise ValueError(f"unknown category '{category}'")
+    book['category'] = category
+
+    try:
+        book['price'] = round(float(row.get('price')), 2)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price '{row.get('price')}'") from None
+    if book['price'] < 0:
+        raise ValueError("price must not be negative")
+
+    try:
+        stock = float(row.get('stock'))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid stock '{row.get('stock')}'") from None
+    if stock < 0 or stock != int(stock):
+        raise ValueError(f"stock must be a whole number >= 0, got '{row.get('stock')}'")
+    book['stock'] = int(stock)
+
+    book['description'] = str(row.get('description') or '').strip()
+    book['image'] = str(row.get('image') or '').strip() or DEFAULT_IMAGE
+
+    if row.get('id') not in (None, ''):
+        try:
+            book['id'] = int(row['id'])
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid id '{row['id']}'") from None
+        if book['id'] <= 0:
+            raise ValueError("id must be positive")
+    return book
+
+
+def import_books(stream, fmt, cache=None):
+    """Import books from a text stream of CSV or JSON lines
+
+    Everything valid is saved in one write under the storage lock; invalid
+    rows are skipped and reported. With a catalog.CatalogCache, the cache
+    is patched instead of reloaded. Returns a report dict with rows,
+    added, updated, errors (up to MAX_ERRORS (line, message) pairs),
+    error_count, seconds and rows_per_second.
+    """
+    started = time.perf_counter()
+    report = {'rows': 0, 'added': 0, 'updated': 0, 'errors': [], 'error_count': 0}
+
+    with storage.transaction():
+        books = load_json(BOOKS_FILE, [])
+        position = {book['id']: i for i, book in enumerate(books)}
+        next_id = max(position, default=0) + 1
+        upserts = {}        # book id -> saved book dict
+        stock_updates = {}  # existing book id -> new stock level
+
+        for line_num, row in read_rows(stream, fmt):
+            report['rows'] += 1
+            try:
+                book = validate_row(row)
+            except ValueError as e:
+                report['error_count'] += 1
+                if len(report['errors']) < MAX_ERRORS:
+                    report['errors'].append((line_num, str(e)))
+                continue
+
+            book_id = book.setdefault('id', next_id)
+            next_id = max(next_id, book_id + 1)
+            if book_id in position:
+                books[position[book_id]] = book
+                stock_updates[book_id] = book['stock']
+                if book_id not in upserts:
+                    report['updated'] += 1
+            else:
+                position[book_id] = len(books)
+                books.append(book)
+                report['added'] += 1
+            upserts[book_id] = book
+
+        def write():
+            save_json(BOOKS_FILE, books)
+            if stock_updates:
+                storage.set_stocks(stock_updates)
+
+        if upserts:
+            if cache is not None:
+                cache.update(write, upserts=list(upserts.values()))
+            else:
+                write()
+
+    return _finish(report, started)
+
+
+def export_books(books, out, fmt):
+    """Stream books to a text stream as CSV or JSON lines; returns a report dict"""
+    started = time.perf_counter()
+    report = {'rows': 0}
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=FIELDS, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        for book in books:
+            writer.writerow(dict(book))
+            report['rows'] += 1
+    elif fmt == 'jsonl':
+        for book in books:
+            out.write(json.dumps({field: book.get(field) for field in FIELDS}, ensure_ascii=False) + '\n')
+            report['rows'] += 1
+    else:
+        raise ValueError(f"Unknown format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+    return _finish(report, started)
+
+
+def _finish(report, started):
+    report['seconds'] = time.perf_counter() - started
+    report['rows_per_second'] = report['rows'] / report['seconds'] if report['seconds'] else 0.0
+    return report
+
+
+def open_text(binary):
+    """Wrap a binary stream (e.g. an uploaded file) for reading text feeds"""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk catalog import/export")
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('import', "import books from a CSV or JSONL feed"),
+                            ('export', "export the catalog as CSV or JSONL")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('path')
+        command.add_argument('--format', choices=FORMATS, help="default: from the file extension")
+
+    args = parser.parse_args(argv)
+    try:
+        fmt = args.format or detect_format(args.path)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if args.command == 'import':
+        with open(args.path, encoding='utf-8-sig', newline='') as f:
+            report = import_books(f, fmt)
+        storage.flush()
+        for line_num, message in report['errors']:
+            print(f"⚠️ line {line_num}: {message}")
+        print(f"✅ Imported {report['rows']} rows in {report['seconds']:.2f}s "
+              f"({report['rows_per_second']:,.0f} rows/s): {report['added']} added, "
+              f"{report['updated']} updated, {report['error_count']} rejected")
+    else:
+        with open(args.path, 'w', encoding='utf-8', newline='') as f:
+            report = export_books(load_json(BOOKS_FILE, []), f, fmt)
+        print(f"✅ Exported {report['rows']} books to {args.path} in {report['seconds']:.2f}s "
+              f"({report['rows_per_second']:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
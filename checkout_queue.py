@@ -0,0 +1,209 @@
+"""
+Queued and group-committed checkout for the BookStore app.
+
+submit() turns a cart into an order, gives it an id taken from a block
+reserved up front and queues it, so the session gets the order id and
+status back at once. A single committer thread per server process takes
+what is queued and places it as one group commit with
+orders.place_orders(): every order in the batch is validated against
+stock together and the batch is written with one stock update and one
+orders append. The "My Orders" view polls status() until the order is
+placed or rejected. place() queues the same way but waits for the
+outcome, so concurrent sessions checking out at once share one write.
+
+Orders that queue up while a commit is being written form the next
+batch. After the first order of a batch, the committer also waits up to
+window_ms milliseconds for stragglers, but only until the batch is as
+large as the last one (sessions waiting on this batch can't send more),
+so a lone session never waits and steady concurrent traffic is committed
+in groups of up to max_batch orders.
+
+Orders still queued when the process exits are committed first. Ids of
+a reserved block that were never handed out are skipped, so order ids
+can have gaps after a restart.
+
+    [checkout]
+    mode = "sync"       # "queue" returns at once, "group" waits for the group commit
+    max_batch = 100
+    group_window_ms = 5
+"""
+
+import atexit
+import collections
+import queue
+import threading
+import time
+
+import orders
+import storage
+from settings import get_setting
+
+QUEUED = 'Queued'
+PLACED = 'Placed'
+REJECTED = 'Rejected'
+
+# Order ids reserved from the sequence at a time
+ID_BLOCK = 20
+
+# Finished tickets kept for polling, oldest dropped first
+KEEP_FINISHED = 10_000
+
+
+class CheckoutQueue:
+    """Queue of checkouts placed in batches by one committer thread"""
+
+    def __init__(self, max_batch=100, window_ms=5):
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self.batches = 0                           # commits made, for monitoring
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self._ids = iter(())                       # reserved ids not handed out yet
+        self._tickets = collections.OrderedDict()  # order id -> ticket
+        self._by_token = {}                        # cart token -> order id
+        self._tokens = {}                          # order id -> cart token
+        self._thread = None
+
+    def start(self):
+        """Start the committer thread (once)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='checkout-committer', daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=30):
+        """Commit what is queued, then stop the committer thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, username, cart):
+        """Queue a checkout of a cart.Cart; returns its ticket at once
+
+        A ticket is {'order_id', 'status', 'message'} with status QUEUED
+        until the committer places (PLACED) or rejects (REJECTED) the
+        order. Submitting the same cart again while its order is queued or
+        placed returns the same ticket; after a rejection it is a new try.
+        """
+        if not cart:
+            return {'order_id': None, 'status': REJECTED, 'message': "Cart is empty"}
+        with self._lock:
+            order_id = self._by_token.get(cart.token)
+            if order_id is not None and order_id in self._tickets:
+                return dict(self._tickets[order_id])
+            order_id = next(self._ids, None)
+            if order_id is None:
+                self._ids = iter(storage.reserve_order_ids(ID_BLOCK))
+                order_id = next(self._ids)
+            order = orders.new_order(username, cart, order_id)
+            self._tickets[order_id] = {'order_id': order_id, 'status': QUEUED,
+                                       'message': f"Order #{order_id} is being placed"}
+            self._by_token[cart.token] = order_id
+            self._tokens[order_id] = cart.token
+            ticket = dict(self._tickets[order_id])
+        self.start()
+        self._queue.put(order)
+        return ticket
+
+    def place(self, username, cart, timeout=None):
+        """Check out a cart.Cart through the queue and wait for the outcome
+
+        Returns (success, message) like orders.checkout(), or a failure if
+        the order isn't committed within timeout seconds.
+        """
+        ticket = self.submit(username, cart)
+        order_id = ticket['order_id']
+        with self._finished:
+            finished = self._finished.wait_for(
+                lambda: order_id is None or self._tickets.get(order_id, {}).get('status') != QUEUED, timeout)
+            ticket = dict(self._tickets.get(order_id, ticket))
+        if not finished:
+            return False, f"Order #{order_id} is still being placed"
+        return ticket['status'] == PLACED, ticket['message']
+
+    def status(self, order_id):
+        """The current ticket of a submitted order, or None if unknown"""
+        with self._lock:
+            ticket = self._tickets.get(order_id)
+            return dict(ticket) if ticket else None
+
+    def _run(self):
+        stopping = False
+        last_size = 0
+        while not stopping:
+            batch = [self._queue.get()]
+            # Wait (up to the window) only for as many orders as the last
+            # batch had: a lone session would pay the window in latency,
+            # and sessions already in the batch won't send more
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch and batch[-1] is not None:
+                try:
+                    if len(batch) < last_size:
+                        batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [order for order in batch if order is not None]
+            if batch:
+                self._commit(batch)
+            last_size = len(batch)
+
+    def _commit(self, batch):
+        try:
+            results = orders.place_orders(batch)
+        except Exception as e:
+            results = [(False, f"Error placing order: {e}", None)] * len(batch)
+        self.batches += 1
+        with self._lock:
+            for order, (success, message, placed) in zip(batch, results):
+                self._tickets[order['order_id']] = {
+                    'order_id': placed['order_id'] if placed else order['order_id'],
+                    'status': PLACED if success else REJECTED,
+                    'message': message,
+                }
+                if not success:
+                    # Stock or a transient error may change: let the cart be retried
+                    self._by_token.pop(self._tokens.pop(order['order_id']), None)
+            self._forget_finished()
+            self._finished.notify_all()
+
+    def _forget_finished(self):
+        """Drop the oldest finished tickets once there are more than KEEP_FINISHED"""
+        excess = len(self._tickets) - KEEP_FINISHED
+        if excess <= 0:
+            return
+        for order_id in list(self._tickets):
+            if excess <= 0:
+                break
+            if self._tickets[order_id]['status'] != QUEUED:
+                del self._tickets[order_id]
+                token = self._tokens.pop(order_id, None)
+                if token is not None:
+                    self._by_token.pop(token, None)
+                excess -= 1
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Get the process-wide checkout queue (settings under [checkout] in config.toml)"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = CheckoutQueue(max_batch=get_setting('checkout', 'max_batch', 100),
+                                       window_ms=get_setting('checkout', 'group_window_ms', 5))
+                atexit.register(_queue.stop)
+    return _queue
+
+
+def mode():
+    """How checkouts are placed ([checkout] mode): "queue", "group" or "sync"."""
+    return get_setting('checkout', 'mode', 'sync')
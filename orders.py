@@ -0,0 +1,167 @@
+"""
+Order placement for the BookStore app.
+
+Checkout is transactional: stock for every cart line is taken atomically
+(under a cross-process lock or a SQLite transaction) before the order is
+written, so concurrent shoppers can never oversell a book. Orders are
+placed in groups (place_orders): a batch of checkouts is validated
+against stock together and written with one stock update and one orders
+append, and a single checkout is a group of one. It is also
+idempotent: an order stores the checkout token of its cart, and checking
+out a cart whose token already has an order returns that order.
+"""
+
+import time
+from datetime import datetime
+
+import storage
+
+TAX_RATE = 0.08
+FREE_SHIPPING_THRESHOLD = 50
+SHIPPING_FEE = 5.99
+
+ORDER_STATUSES = ["Pending", "Processing", "Shipped", "Delivered", "Cancelled"]
+
+
+def calculate_totals(subtotal):
+    """Return (tax, shipping, total) for a cart subtotal"""
+    tax = subtotal * TAX_RATE
+    shipping = SHIPPING_FEE if subtotal < FREE_SHIPPING_THRESHOLD else 0
+    return tax, shipping, subtotal + tax + shipping
+
+
+def out_of_stock_message(shortfalls, titles):
+    """Describe the cart lines that could not be filled"""
+    lines = []
+    for book_id, requested, available in shortfalls:
+        title = titles.get(book_id, f"Book #{book_id}")
+        if available <= 0:
+            lines.append(f"'{title}' is out of stock")
+        else:
+            lines.append(f"'{title}': only {available} left (you requested {requested})")
+    return "Out of stock: " + "; ".join(lines)
+
+
+def new_order(username, cart, order_id=None):
+    """Build the order for a cart.Cart, stamped now
+
+    Without an order_id, one is allocated when the order is placed.
+    """
+    ts = time.time()
+    return {
+        'order_id': order_id,
+        'username': username,
+        'items': cart.order_items(),
+        'subtotal': round(cart.subtotal, 2),
+        'tax': round(cart.tax, 2),
+        'shipping': round(cart.shipping, 2),
+        'total': round(cart.total, 2),
+        'date': datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S'),
+        'ts': ts,
+        'status': 'Pending',
+        'token': cart.token,
+    }
+
+
+def place_orders(orders):
+    """Place built orders (see new_order) as one group commit
+
+    All orders are checked against stock together, in order, and the ones
+    that can be filled are written with a single stock update and a single
+    orders append, in one storage transaction. An order that can't be
+    filled doesn't affect the others, and an order whose cart token was
+    already placed (earlier, or earlier in the same batch) returns that
+    order. Returns one (success, message, order) per order.
+    """
+    results = [None] * len(orders)
+    with storage.transaction():
+        pending, seen = [], {}
+        for i, order in enumerate(orders):
+            placed = seen.get(order['token']) or storage.get_order_by_token(order['token'])
+            if placed is not None:
+                results[i] = (True, f"Order #{placed['order_id']} was already placed", placed)
+            else:
+                seen[order['token']] = order
+                pending.append(i)
+
+        requests, titles = [], {}
+        for i in pending:
+            quantities = {}
+            for item in orders[i]['items']:
+                quantities[item['id']] = quantities.get(item['id'], 0) + 1
+                titles[item['id']] = item['title']
+            requests.append(quantities)
+        filled = []
+        for i, quantities, shortfalls in zip(pending, requests, storage.reserve_stock_batch(requests)):
+            if shortfalls:
+                del seen[orders[i]['token']]
+                results[i] = (False, out_of_stock_message(shortfalls, titles), None)
+            else:
+                filled.append((i, quantities))
+        if not filled:
+            return results
+
+        batch = [orders[i] for i, _ in filled]
+        missing = [order for order in batch if order['order_id'] is None]
+        if missing:
+            first = storage.next_order_id()
+            for offset, order in enumerate(missing):
+                order['order_id'] = first + offset
+        try:
+            storage.append_orders(batch)
+        except Exception as e:
+            taken = {}
+            for _, quantities in filled:
+                for book_id, qty in quantities.items():
+                    taken[book_id] = taken.get(book_id, 0) + qty
+            storage.release_stock(taken)
+            for i, _ in filled:
+                results[i] = (False, f"Error placing order: {e}", None)
+            return results
+        for i, _ in filled:
+            results[i] = (True, f"Order #{orders[i]['order_id']} placed successfully!", orders[i])
+    return results
+
+
+def checkout(username, cart):
+    """Place an order for a cart.Cart
+
+    Returns (success, message, order). Nothing is written unless every
+    cart line can be filled from current stock, or if an order was already
+    placed with the cart's token (that order is returned instead).
+    """
+    if not cart:
+        return False, "Cart is empty", None
+
+    return place_orders([new_order(username, cart)])[0]
+
+
+def bulk_update_status(order_ids, new_status, expected_status=None):
+    """Move many orders to new_status in one storage transaction
+
+    With expected_status, only orders currently in that status are moved
+    (so a concurrent change isn't overwritten). Returns a list of
+    (order_id, success, message), one per requested id.
+    """
+    if new_status not in ORDER_STATUSES:
+        raise ValueError(f"Unknown order status '{new_status}'")
+
+    report = {}
+    with storage.transaction():
+        current = storage.get_order_statuses(order_ids)
+        changes = {}
+        for order_id in order_ids:
+            status = current.get(order_id)
+            if status is None:
+                report[order_id] = (False, "Order not found")
+            elif expected_status is not None and status != expected_status:
+                report[order_id] = (False, f"Is {status}, not {expected_status}")
+            elif status == new_status:
+                report[order_id] = (False, f"Already {new_status}")
+            else:
+                changes[order_id] = new_status
+                report[order_id] = (True, f"{status} → {new_status}")
+        for order_id in storage.set_order_statuses(changes):
+            report[order_id] = (False, "Order not found")
+
+    return [(order_id,) + report[order_id] for order_id in order_ids]
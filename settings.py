@@ -0,0 +1,55 @@
+"""
+App settings read from config.toml.
+
+Streamlit only understands its own sections; the BookStore keeps its
+settings in extra sections of the same file, for example:
+
+    [storage]
+    backend = "sqlite"
+"""
+
+import os
+
+try:
+    import tomllib as _toml_reader
+
+    def _read_toml(path):
+        with open(path, 'rb') as f:
+            return _toml_reader.load(f)
+except ImportError:  # Python < 3.11, fall back to the toml package Streamlit ships with
+    import toml as _toml_reader
+
+    def _read_toml(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return _toml_reader.load(f)
+
+CONFIG_FILES = (os.path.join('.streamlit', 'config.toml'), 'config.toml')
+
+_settings = None
+
+
+def load_settings():
+    """Load settings from the first config file found (cached per process)"""
+    global _settings
+    if _settings is None:
+        settings = {}
+        for path in CONFIG_FILES:
+            if os.path.exists(path):
+                try:
+                    settings = _read_toml(path)
+                except (OSError, ValueError):
+                    settings = {}
+                break
+        _settings = settings
+    return _settings
+
+
+def get_setting(section, key, default=None):
+    """Get a single setting, e.g. get_setting('storage', 'backend', 'json')"""
+    return load_settings().get(section, {}).get(key, default)
+
+
+def reset_settings():
+    """Forget cached settings so the next lookup re-reads the config file"""
+    global _settings
+    _settings = None
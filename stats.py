@@ -0,0 +1,205 @@
+"""
+Materialized order statistics for the BookStore app.
+
+Every order contributes to a few aggregate views: per user
+({'orders': 1, 'spent': 42.5, 'items': 3}), store-wide totals, and
+revenue and units sold per category and per book, and hourly, daily and
+monthly revenue rollups keyed by time bucket. The storage backends
+keep these views up to date as orders are placed and as their status
+changes, so dashboards read a handful of totals instead of rescanning
+every order.
+
+Cancelled orders still count as orders, but not towards money or items.
+compute() rebuilds the views from the orders themselves; drift() compares
+two sets of views, which is how stored aggregates are checked.
+"""
+
+from datetime import datetime, timedelta
+
+# Orders in these states don't count towards money or items sold
+EXCLUDED_STATUSES = frozenset({'Cancelled'})
+
+# Fields holding money, kept rounded to cents
+MONEY_FIELDS = frozenset({'spent', 'revenue'})
+
+
+def is_counted(order):
+    """Whether an order counts towards money and items sold"""
+    return order['status'] not in EXCLUDED_STATUSES
+
+
+def user_view(order):
+    """Per-user totals: orders placed, money spent, books bought"""
+    deltas = {'orders': 1}
+    if is_counted(order):
+        deltas['spent'] = order['total']
+        deltas['items'] = len(order['items'])
+    return [(order['username'], deltas)]
+
+
+def store_view(order):
+    """Store-wide totals under the key 'all': orders placed and revenue"""
+    deltas = {'orders': 1}
+    if is_counted(order):
+        deltas['revenue'] = order['total']
+    return [('all', deltas)]
+
+
+def _item_view(order, key_of):
+    """Units sold and item revenue (before tax and shipping) grouped by key_of(item)"""
+    if not is_counted(order):
+        return []
+    grouped = {}
+    for item in order['items']:
+        deltas = grouped.setdefault(key_of(item), {'units': 0, 'revenue': 0})
+        deltas['units'] += 1
+        deltas['revenue'] += item['price']
+    return list(grouped.items())
+
+
+def category_view(order):
+    """Units and revenue per book category"""
+    return _item_view(order, lambda item: item.get('category', 'Unknown'))
+
+
+def book_view(order):
+    """Units and revenue per book id"""
+    return _item_view(order, lambda item: item['id'])
+
+
+# Time rollup view -> strftime format of its bucket keys (local time).
+# Keys sort chronologically, so a date range is a key range.
+ROLLUPS = {
+    'hourly': '%Y-%m-%d %H:00',
+    'daily': '%Y-%m-%d',
+    'monthly': '%Y-%m',
+}
+
+
+def order_time(order):
+    """Epoch timestamp of an order (parsed from 'date' for orders without 'ts')"""
+    if 'ts' in order:
+        return order['ts']
+    return datetime.strptime(order['date'], '%Y-%m-%d %H:%M:%S').timestamp()
+
+
+def _rollup_view(rollup):
+    def view(order):
+        deltas = {'orders': 1}
+        if is_counted(order):
+            deltas['revenue'] = order['total']
+            deltas['units'] = len(order['items'])
+        return [(datetime.fromtimestamp(order_time(order)).strftime(ROLLUPS[rollup]), deltas)]
+    view.__doc__ = f"{rollup.capitalize()} orders, revenue and units sold"
+    return view
+
+
+# view name -> function returning [(key, {field: delta})] for one order
+VIEWS = {
+    'user': user_view,
+    'store': store_view,
+    'category': category_view,
+    'book': book_view,
+}
+VIEWS.update((rollup, _rollup_view(rollup)) for rollup in ROLLUPS)
+
+# Bumped whenever a view is added or its definition changes, so stored
+# aggregates built by an older version are rebuilt
+VERSION = 3
+
+
+def contributions(order):
+    """Yield (view, key, field, delta) for everything one order adds"""
+    for view, contribute in VIEWS.items():
+        for key, deltas in contribute(order):
+            for field, delta in deltas.items():
+                yield view, key, field, delta
+
+
+def status_change(order, new_status):
+    """Yield the (view, key, field, delta) that moving an order to new_status adds"""
+    changed = dict(order, status=new_status)
+    for view, key, field, delta in contributions(order):
+        yield view, key, field, -delta
+    yield from contributions(changed)
+
+
+def add(value, delta, field):
+    """Add a delta to an aggregate field"""
+    total = value + delta
+    return round(total, 2) if field in MONEY_FIELDS else total
+
+
+class Aggregates:
+    """In-memory aggregate views: {view: {key: {field: value}}}"""
+
+    def __init__(self):
+        self.views = {view: {} for view in VIEWS}
+
+    def apply(self, changes):
+        """Apply (view, key, field, delta) changes"""
+        for view, key, field, delta in changes:
+            record = self.views[view].setdefault(key, {})
+            record[field] = add(record.get(field, 0), delta, field)
+
+    def get(self, view, key=None):
+        """All records of a view, or one record ({} if it has none)"""
+        if key is None:
+            return {k: dict(record) for k, record in self.views[view].items()}
+        return dict(self.views[view].get(key, {}))
+
+    def get_range(self, view, start, end):
+        """Records of a view whose keys fall in [start, end]"""
+        return {k: dict(record) for k, record in self.views[view].items() if start <= k <= end}
+
+
+def compute(orders):
+    """Build every view from scratch"""
+    aggregates = Aggregates()
+    for order in orders:
+        aggregates.apply(contributions(order))
+    return aggregates.views
+
+
+def rollup_keys(rollup, start, end):
+    """Every bucket key of a rollup from date start to date end, inclusive"""
+    keys = []
+    if rollup == 'monthly':
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            keys.append(f'{year:04d}-{month:02d}')
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return keys
+    step = timedelta(hours=1) if rollup == 'hourly' else timedelta(days=1)
+    moment = datetime.combine(start, datetime.min.time())
+    stop = datetime.combine(end + timedelta(days=1), datetime.min.time())
+    while moment < stop:
+        keys.append(moment.strftime(ROLLUPS[rollup]))
+        moment += step
+    return keys
+
+
+def series(records, keys, field):
+    """{key: value of field} for every key, 0 where a bucket has no orders"""
+    return {key: records.get(key, {}).get(field, 0) for key in keys}
+
+
+def top(records, field, n):
+    """The n records of a view with the largest (positive) field, as (key, record) pairs"""
+    ranked = [(key, record) for key, record in records.items() if record.get(field, 0) > 0]
+    return sorted(ranked, key=lambda kv: kv[1][field], reverse=True)[:n]
+
+
+def drift(stored, expected):
+    """List (view, key, field, stored, expected) for every value that differs"""
+    problems = []
+    for view in VIEWS:
+        have, want = stored.get(view, {}), expected.get(view, {})
+        for key in sorted(set(have) | set(want), key=str):
+            fields = set(have.get(key, {})) | set(want.get(key, {}))
+            for field in sorted(fields):
+                a = have.get(key, {}).get(field, 0)
+                b = want.get(key, {}).get(field, 0)
+                if abs(a - b) > 0.005:
+                    problems.append((view, key, field, a, b))
+    return problems
@@ -0,0 +1,1359 @@
+#!/usr/bin/env python3
+"""
+Pluggable storage for the BookStore app.
+
+The app reads and writes its three collections (users, books, orders)
+through load_json()/save_json(). This module routes those calls to the
+backend selected in config.toml:
+
+    [storage]
+    backend = "json"            # or "sqlite"
+    sqlite_path = "bookstore.db"
+    orders_fsync = "always"     # or "interval" / "never"
+
+With the JSON backend, orders are kept in an append-only log
+(orders.jsonl) instead of being rewritten on every checkout.
+
+Maintenance commands:
+
+    python storage.py migrate          # copy JSON data into SQLite
+    python storage.py compact-orders   # fold status updates into the order log
+    python storage.py check-stats      # check SQLite order statistics for drift
+"""
+
+import argparse
+import atexit
+import contextlib
+import copy
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import stats
+from settings import get_setting
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are serialized
+    fcntl = None
+
+# File paths for data storage
+USERS_FILE = 'users.json'
+BOOKS_FILE = 'books.json'
+ORDERS_FILE = 'orders.json'
+ORDER_LOG_FILE = 'orders.jsonl'
+INVENTORY_FILE = 'inventory.json'
+LOCK_FILE = 'bookstore.lock'
+
+# Collection name for each data file
+COLLECTIONS = {
+    USERS_FILE: 'users',
+    BOOKS_FILE: 'books',
+    ORDERS_FILE: 'orders',
+}
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+
+def atomic_write(filename, write, mode='w'):
+    """Write a file crash-safely: temp file, fsync, then os.replace()
+
+    Readers (other sessions or processes) see either the old file or the
+    new one, never a truncated one. write(f) fills the temp file.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(filename)}.', suffix='.tmp')
+    try:
+        if hasattr(os, 'fchmod'):  # POSIX only
+            os.fchmod(fd, 0o644)
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(filename, data):
+    """Atomically replace a JSON file"""
+    atomic_write(filename, lambda f: json.dump(data, f, indent=2))
+
+
+class FileLock:
+    """Re-entrant exclusive lock shared by threads and processes (flock)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+
+class OrderLog:
+    """Append-only JSON-lines order log with in-memory offset and per-user indexes
+
+    Each line is either a full order ({"op": "order", "order": {...}}) or a
+    status change ({"op": "status", "order_id": 1, "status": "Shipped"}).
+    Checkout appends one line, so its cost does not grow with history.
+
+    Order ids come from a monotonic sequence: the highest id ever logged.
+    A rewrite starts the new log with {"op": "seq", "last_id": N} so ids of
+    removed orders are never handed out again.
+
+    Every log file starts with {"op": "epoch", "epoch": "<random id>"},
+    written when the file is created or rewritten. Readers compare it
+    before trusting their offsets, since a replaced file can reuse the
+    inode of the one they indexed.
+
+    Appends and rewrites run under write_lock, a FileLock shared with every
+    process that writes the log (the backend's storage lock), so a
+    compaction in one process never drops records another one appends.
+    """
+
+    def __init__(self, path, fsync='always', fsync_interval=1.0, write_lock=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}' (expected one of: {', '.join(FSYNC_POLICIES)})")
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._write_lock = write_lock or FileLock(f'{path}.lock')
+        self._lock = threading.RLock()
+        self._last_fsync = 0.0
+        self._unsynced = False   # appended since the last fsync ("interval" policy)
+        self._sync_timer = None
+        if fsync == 'interval':
+            atexit.register(self.sync)
+        self._reset_index()
+        self._refresh()
+
+    def _reset_index(self):
+        self._offsets = {}      # order_id -> byte offset of its order record
+        self._status = {}       # order_id -> latest status
+        self._by_user = {}      # username -> order_ids, oldest first
+        self._by_token = {}     # checkout token -> order_id
+        self._last_id = 0       # highest order id ever allocated
+        self.stats = stats.Aggregates()
+        self._size = 0          # bytes of the log covered by the index
+        self._inode = None
+        self._epoch = None      # epoch record of the indexed file
+
+    def _open(self):
+        """Open the log and bring the index up to date with that file
+
+        Offsets are only valid for the file they were indexed from, so
+        reads seek in the file returned here (None if there is no log),
+        not in whatever the path points to after a compaction elsewhere.
+        """
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            self._reset_index()
+            return None
+        stat = os.fstat(f.fileno())
+        epoch = self._read_epoch(f)
+        if stat.st_ino != self._inode or epoch != self._epoch or stat.st_size < self._size:
+            # First open, or the log was compacted/replaced by another process
+            self._reset_index()
+            self._inode = stat.st_ino
+            self._epoch = epoch
+        if stat.st_size > self._size:
+            self._scan(f, self._size)
+        return f
+
+    @classmethod
+    def _read_epoch(cls, f):
+        """The epoch id a log file starts with (None for logs written before epochs)"""
+        f.seek(0)
+        record = cls._parse(f.readline())
+        return record.get('epoch') if isinstance(record, dict) and record.get('op') == 'epoch' else None
+
+    @staticmethod
+    def _epoch_record():
+        return json.dumps({'op': 'epoch', 'epoch': uuid.uuid4().hex}).encode() + b'\n'
+
+    def _refresh(self):
+        """Bring the index up to date with the file (cheap when unchanged)"""
+        f = self._open()
+        if f is not None:
+            f.close()
+
+    def _scan(self, f, offset):
+        """Index every complete record from offset to the end of the file"""
+        f.seek(offset)
+        while True:
+            line = f.readline()
+            if not line.endswith(b'\n'):
+                break  # end of file, or a partially written record picked up once complete
+            record = self._parse(line)
+            if record is not None:
+                self._index_record(record, offset, f)
+            offset += len(line)
+        self._size = offset
+
+    @staticmethod
+    def _parse(line):
+        """Decode one log line; torn or blank lines are skipped"""
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def _index_record(self, record, offset, f):
+        if record['op'] == 'order':
+            order = record['order']
+            if order['order_id'] not in self._offsets:
+                self._by_user.setdefault(order['username'], []).append(order['order_id'])
+                if order.get('token'):
+                    self._by_token[order['token']] = order['order_id']
+                self.stats.apply(stats.contributions(order))
+                self._last_id = max(self._last_id, order['order_id'])
+            self._offsets[order['order_id']] = offset
+            self._status[order['order_id']] = order['status']
+        elif record['op'] == 'status' and record['order_id'] in self._offsets:
+            order_id = record['order_id']
+            if record['status'] != self._status[order_id]:
+                self.stats.apply(stats.status_change(self._read_from(f, [order_id])[0], record['status']))
+            self._status[order_id] = record['status']
+        elif record['op'] == 'seq':
+            self._last_id = max(self._last_id, record['last_id'])
+
+    def _append(self, records):
+        """Append records in a single write and apply the fsync policy"""
+        data = b''.join(json.dumps(r).encode() + b'\n' for r in records)
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if not size:
+                data = self._epoch_record() + data
+            else:
+                os.lseek(fd, size - 1, os.SEEK_SET)
+                if os.read(fd, 1) != b'\n':
+                    data = b'\n' + data  # never glue a record onto a torn one
+            os.write(fd, data)
+            if self.fsync == 'always' or (
+                    self.fsync == 'interval' and time.monotonic() - self._last_fsync >= self.fsync_interval):
+                self._fsync(fd)
+            elif self.fsync == 'interval':
+                self._unsynced = True
+                self._schedule_sync()
+        finally:
+            os.close(fd)
+        self._refresh()
+
+    def _fsync(self, fd):
+        os.fsync(fd)
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+    def _schedule_sync(self):
+        """Make sure the last append of a burst is synced within fsync_interval"""
+        if self._sync_timer is None:
+            delay = max(self.fsync_interval - (time.monotonic() - self._last_fsync), 0)
+            self._sync_timer = threading.Timer(delay, self.sync)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+
+    def sync(self):
+        """fsync records appended since the last fsync (run by a timer and at exit)"""
+        with self._lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            if not self._unsynced:
+                return
+            try:
+                fd = os.open(self.path, os.O_RDWR)
+            except FileNotFoundError:
+                return
+            try:
+                self._fsync(fd)
+            finally:
+                os.close(fd)
+
+    def append_many(self, orders):
+        """Append new orders in a single write (and a single fsync)"""
+        with self._write_lock, self._lock:
+            self._append([{'op': 'order', 'order': order} for order in orders])
+
+    def set_status(self, order_id, status):
+        """Record a status change; returns False for an unknown order"""
+        return not self.set_statuses({order_id: status})
+
+    def set_statuses(self, changes):
+        """Record {order_id: status} changes in a single append; returns the unknown ids"""
+        with self._write_lock, self._lock:
+            self._refresh()
+            missing = [order_id for order_id in changes if order_id not in self._offsets]
+            records = [{'op': 'status', 'order_id': order_id, 'status': status}
+                       for order_id, status in changes.items() if order_id in self._offsets]
+            if records:
+                self._append(records)
+            return missing
+
+    def statuses(self, order_ids):
+        """{order_id: current status} for the known ids among order_ids"""
+        with self._lock:
+            self._refresh()
+            return {order_id: self._status[order_id] for order_id in order_ids if order_id in self._status}
+
+    def for_token(self, token):
+        """Read the order placed with a checkout token, or None, using the token index"""
+        with self._lock:
+            orders = self._read(lambda: [self._by_token[token]] if token in self._by_token else [])
+            return orders[0] if orders else None
+
+    def for_user(self, username):
+        """Read one user's orders, oldest first, using the per-user index"""
+        with self._lock:
+            return self._read(lambda: self._by_user.get(username, ()))
+
+    def get_stats(self, view, key=None):
+        """Read an aggregate view (see stats.py), kept current as records are indexed"""
+        with self._lock:
+            self._refresh()
+            return self.stats.get(view, key)
+
+    def get_stats_range(self, view, start, end):
+        """Read the records of an aggregate view with keys in [start, end]"""
+        with self._lock:
+            self._refresh()
+            return self.stats.get_range(view, start, end)
+
+    def all_stats(self):
+        """Every aggregate view, for drift checks"""
+        with self._lock:
+            self._refresh()
+            return {view: self.stats.get(view) for view in stats.VIEWS}
+
+    def rebuild_index(self):
+        """Drop the in-memory indexes and aggregates and rebuild them from the log"""
+        with self._lock:
+            self._reset_index()
+            self._refresh()
+
+    def _read(self, select):
+        """Read the orders whose ids select() picks from the up-to-date index"""
+        f = self._open()
+        if f is None:
+            return []
+        with f:
+            return self._read_from(f, select())
+
+    def _read_from(self, f, order_ids):
+        """Read indexed orders by seeking to each one in f, with their latest status"""
+        orders = []
+        position = f.tell()
+        for order_id in order_ids:
+            if order_id in self._offsets:
+                f.seek(self._offsets[order_id])
+                order = json.loads(f.readline())['order']
+                order['status'] = self._status[order_id]
+                orders.append(order)
+        f.seek(position)
+        return orders
+
+    def next_id(self):
+        """Next order id from the sequence (hold the storage write lock until it is appended)"""
+        with self._lock:
+            self._refresh()
+            return self._last_id + 1
+
+    def reserve_ids(self, count):
+        """Take count ids from the sequence now (a seq record); returns the first"""
+        with self._write_lock, self._lock:
+            self._refresh()
+            first = self._last_id + 1
+            self._append([{'op': 'seq', 'last_id': self._last_id + count}])
+            return first
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def read_all(self):
+        """Read every order with its latest status, oldest first"""
+        with self._lock:
+            f = self._open()
+            if f is None:
+                return []
+            orders = {}
+            with f:
+                f.seek(0)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    record = self._parse(line)
+                    if record is None:
+                        continue
+                    if record['op'] == 'order':
+                        orders[record['order']['order_id']] = record['order']
+                    elif record['op'] == 'status' and record['order_id'] in orders:
+                        orders[record['order_id']]['status'] = record['status']
+            return list(orders.values())
+
+    def rewrite(self, orders):
+        """Replace the log with one order record per order (the id sequence carries over)"""
+        def write(f):
+            f.write(self._epoch_record())
+            if last_id:
+                f.write(json.dumps({'op': 'seq', 'last_id': last_id}).encode() + b'\n')
+            for order in orders:
+                f.write(json.dumps({'op': 'order', 'order': order}).encode() + b'\n')
+
+        with self._write_lock, self._lock:
+            self._refresh()
+            last_id = self._last_id
+            atomic_write(self.path, write, mode='wb')
+            self._reset_index()
+            self._refresh()
+
+    def compact(self):
+        """Fold status updates back into their orders; returns (before, after) sizes"""
+        with self._write_lock, self._lock:
+            self._refresh()
+            before = self._size
+            self.rewrite(self.read_all())
+            return before, self._size
+
+
+class JsonBackend:
+    """Stores users and books as whole JSON files and orders as an append-only log
+
+    Stock levels live in inventory.json, a small per-book counter map, so
+    checkout never rewrites the catalog; loads overlay it onto the books.
+    Writes that must not interleave run under a cross-process file lock.
+
+    With coalesce_window > 0, saves are held in memory for that many
+    seconds and a burst of saves to the same file becomes a single write.
+    Loads in this process see the pending data immediately, but other
+    processes only see it once it is flushed, so transaction() no longer
+    keeps their read-modify-write cycles from losing updates: coalescing
+    is for a single server process only.
+    """
+
+    name = 'json'
+
+    def __init__(self, order_log=ORDER_LOG_FILE, fsync='always', fsync_interval=1.0, coalesce_window=0,
+                 inventory=INVENTORY_FILE, lock_file=LOCK_FILE):
+        self.order_log_path = order_log
+        self.inventory_path = inventory
+        self._lock = FileLock(lock_file)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.coalesce_window = coalesce_window
+        self._orders = None
+        self._orders_lock = threading.Lock()
+        self._pending = {}          # filename -> data waiting to be flushed
+        self._pending_seq = 0
+        self._flush_timer = None
+        self._write_lock = threading.RLock()
+        if coalesce_window > 0:
+            atexit.register(self.flush)
+
+    @property
+    def orders(self):
+        """The order log, opened (and indexed) on first use"""
+        if self._orders is None:
+            with self._orders_lock:
+                if self._orders is None:
+                    log = OrderLog(self.order_log_path, self.fsync, self.fsync_interval, write_lock=self._lock)
+                    if not log.exists() and os.path.exists(ORDERS_FILE):
+                        # One-time upgrade from the old whole-file orders.json
+                        log.rewrite(self._load_file(ORDERS_FILE, []))
+                    self._orders = log
+        return self._orders
+
+    @staticmethod
+    def _is_orders(filename):
+        return COLLECTIONS.get(os.path.basename(filename)) == 'orders'
+
+    @staticmethod
+    def _is_books(filename):
+        return COLLECTIONS.get(os.path.basename(filename)) == 'books'
+
+    def transaction(self):
+        """Hold the cross-process write lock for a multi-step update"""
+        return self._lock
+
+    def load(self, filename, default):
+        """Load JSON data from file"""
+        if self._is_orders(filename):
+            return self.orders.read_all() or default
+        with self._write_lock:
+            if filename in self._pending:
+                data = copy.deepcopy(self._pending[filename])
+            else:
+                data = self._load_file(filename, default)
+        if self._is_books(filename) and data:
+            stock = self.get_stock()
+            for book in data:
+                if book['id'] in stock:
+                    book['stock'] = stock[book['id']]
+        return data
+
+    @staticmethod
+    def _load_file(filename, default):
+        if os.path.exists(filename):
+            try:
+                with open(filename, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return default
+        return default
+
+    def save(self, filename, data):
+        """Save data to JSON file"""
+        if self._is_orders(filename):
+            self.orders.rewrite(data)
+            return
+        if self._is_books(filename):
+            self._sync_inventory(data)
+        if self.coalesce_window <= 0:
+            atomic_write_json(filename, data)
+            return
+        with self._write_lock:
+            self._pending[filename] = copy.deepcopy(data)
+            self._pending_seq += 1
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.coalesce_window, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Write out any coalesced saves now (under the cross-process lock)"""
+        with self._lock, self._write_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            for filename, data in self._pending.items():
+                atomic_write_json(filename, data)
+            self._pending.clear()
+
+    def _read_inventory(self):
+        """Read the stock counters, seeding them from books.json the first time"""
+        try:
+            with open(self.inventory_path, 'r') as f:
+                return {int(book_id): stock for book_id, stock in json.load(f)['stock'].items()}
+        except FileNotFoundError:
+            books = self._pending.get(BOOKS_FILE) or self._load_file(BOOKS_FILE, [])
+            return {book['id']: book.get('stock', 0) for book in books}
+
+    def _write_inventory(self, stock):
+        atomic_write_json(self.inventory_path, {'stock': {str(k): v for k, v in stock.items()}})
+
+    def _sync_inventory(self, books):
+        """Add counters for new books and drop deleted ones (never touches existing levels)"""
+        with self._lock:
+            stock = self._read_inventory()
+            ids = {book['id'] for book in books}
+            updated = {book_id: level for book_id, level in stock.items() if book_id in ids}
+            for book in books:
+                updated.setdefault(book['id'], book.get('stock', 0))
+            if updated != stock or not os.path.exists(self.inventory_path):
+                self._write_inventory(updated)
+
+    def get_stock(self):
+        """Current stock level of every book, by id"""
+        return self._read_inventory()
+
+    def set_stock(self, book_id, stock):
+        """Set one book's stock level (admin edits)"""
+        self.set_stocks({book_id: stock})
+
+    def set_stocks(self, stock):
+        """Set the stock level of many books in one write"""
+        with self._lock:
+            levels = self._read_inventory()
+            levels.update(stock)
+            self._write_inventory(levels)
+
+    def reserve_stock_batch(self, requests):
+        """Take stock for a list of {book_id: quantity} requests in one write
+
+        Requests are filled in order against the running levels; each one is
+        all-or-nothing: either every line is filled, or nothing is taken and
+        its unfillable lines are returned as [(book_id, requested, available)].
+        Returns one shortfall list per request (empty when it was filled).
+        """
+        with self._lock:
+            levels = self._read_inventory()
+            results = _fill_requests(levels, requests)
+            if any(not shortfalls for shortfalls in results):
+                self._write_inventory(levels)
+            return results
+
+    def release_stock(self, quantities):
+        """Give back stock taken by reserve_stock_batch (failed checkout)"""
+        with self._lock:
+            levels = self._read_inventory()
+            for book_id, qty in quantities.items():
+                if book_id in levels:
+                    levels[book_id] += qty
+            self._write_inventory(levels)
+
+    def stock_signature(self):
+        """Cheap change detector for the stock counters"""
+        return self._stat_signature(self.inventory_path)
+
+    def exists(self, filename):
+        """Check whether a collection has been created"""
+        if self._is_orders(filename):
+            return self.orders.exists()
+        return filename in self._pending or os.path.exists(filename)
+
+    def append_orders(self, orders):
+        """Append orders to the order log in one write"""
+        self.orders.append_many(orders)
+
+    def set_order_status(self, order_id, status):
+        """Change one order's status; returns False for an unknown order"""
+        return self.orders.set_status(order_id, status)
+
+    def set_order_statuses(self, changes):
+        """Apply {order_id: status} changes in one write; returns the unknown ids"""
+        return self.orders.set_statuses(changes)
+
+    def get_order_statuses(self, order_ids):
+        """{order_id: status} for the orders that exist"""
+        return self.orders.statuses(order_ids)
+
+    def get_user_orders(self, username):
+        """One user's orders, oldest first"""
+        return self.orders.for_user(username)
+
+    def get_order_by_token(self, token):
+        """The order placed with a checkout token, or None"""
+        return self.orders.for_token(token)
+
+    def next_order_id(self):
+        """Next id from the order sequence (call inside transaction())"""
+        return self.orders.next_id()
+
+    def reserve_order_ids(self, count):
+        """Take count ids from the order sequence; returns the first"""
+        with self.transaction():
+            return self.orders.reserve_ids(count)
+
+    def get_order_stats(self, view, key=None):
+        """Read a materialized order statistics view"""
+        return self.orders.get_stats(view, key)
+
+    def get_order_stats_range(self, view, start, end):
+        """Read the records of a statistics view with keys in [start, end]"""
+        return self.orders.get_stats_range(view, start, end)
+
+    def order_stats(self):
+        """Every stored statistics view"""
+        return self.orders.all_stats()
+
+    def rebuild_order_stats(self):
+        """Recompute the statistics views from the order log"""
+        self.orders.rebuild_index()
+
+    def signature(self, filename):
+        """Cheap change detector: inode, size and mtime of the file"""
+        if self._is_orders(filename):
+            filename = self.order_log_path
+        elif filename in self._pending:
+            return ('pending', self._pending_seq)
+        return self._stat_signature(filename)
+
+    @staticmethod
+    def _stat_signature(filename):
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class SqliteBackend:
+    """Stores collections as indexed SQLite tables (WAL mode)"""
+
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL,
+            stock INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS orders (
+            order_id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            status TEXT NOT NULL,
+            token TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_orders_username ON orders (username);
+        CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status);
+        CREATE TABLE IF NOT EXISTS order_stats (
+            view TEXT NOT NULL,
+            key NOT NULL,
+            field TEXT NOT NULL,
+            value NOT NULL,
+            PRIMARY KEY (view, key, field)
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    # collection -> (table, key column, indexed columns, columns only set on insert)
+    TABLES = {
+        'users': ('users', 'username', (), ()),
+        'books': ('books', 'id', (), ('stock',)),
+        'orders': ('orders', 'order_id', ('username', 'status', 'token'), ()),
+    }
+
+    def __init__(self, path, fsync='always'):
+        self.path = path
+        self.synchronous = 'FULL' if fsync == 'always' else 'NORMAL'
+        self._local = threading.local()
+        self._fallback = JsonBackend()
+        self._connect().executescript(self.SCHEMA)
+        self._upgrade_schema()
+
+    def _upgrade_schema(self):
+        """Add the stock and token columns to databases created before they
+        existed, and (re)build order statistics written by an older version
+        of stats.py"""
+        conn = self._connect()
+        if 'stock' not in [row[1] for row in conn.execute('PRAGMA table_info(books)')]:
+            with self.transaction():
+                conn.execute('ALTER TABLE books ADD COLUMN stock INTEGER NOT NULL DEFAULT 0')
+                conn.execute("UPDATE books SET stock = COALESCE(json_extract(data, '$.stock'), 0)")
+        if 'token' not in [row[1] for row in conn.execute('PRAGMA table_info(orders)')]:
+            with self.transaction():
+                conn.execute('ALTER TABLE orders ADD COLUMN token TEXT')
+                conn.execute("UPDATE orders SET token = json_extract(data, '$.token')")
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_token ON orders (token) WHERE token IS NOT NULL')
+        row = conn.execute("SELECT value FROM meta WHERE key = 'order_stats_version'").fetchone()
+        if (row[0] if row else 0) != stats.VERSION:
+            self.rebuild_order_stats()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Run the enclosed writes as one IMMEDIATE transaction (nests)"""
+        conn = self._connect()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @staticmethod
+    def _bump(conn, key):
+        conn.execute("INSERT INTO meta (key, value) VALUES (?, 1) "
+                     "ON CONFLICT(key) DO UPDATE SET value = value + 1", (key,))
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                     "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def _connect(self):
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _rows(collection, data):
+        """Turn a collection into {key: (columns..., insert-only columns..., data_text)} rows"""
+        if collection == 'users':
+            return {name: (json.dumps(user),) for name, user in data.items()}
+        if collection == 'books':
+            # Stock is kept in its own column so checkouts never touch the book data
+            return {book['id']: (book.get('stock', 0), json.dumps({k: v for k, v in book.items() if k != 'stock'}))
+                    for book in data}
+        return {order['order_id']: (order['username'], order['status'], order.get('token'), json.dumps(order))
+                for order in data}
+
+    def load(self, filename, default):
+        """Load a collection from its table"""
+        collection = COLLECTIONS.get(os.path.basename(filename))
+        if collection is None:
+            return self._fallback.load(filename, default)
+
+        table, key, _, _ = self.TABLES[collection]
+        conn = self._connect()
+        if collection == 'books':
+            rows = conn.execute('SELECT data, stock FROM books ORDER BY id').fetchall()
+            return [dict(json.loads(data), stock=stock) for data, stock in rows] or default
+        rows = conn.execute(f'SELECT {key}, data FROM {table} ORDER BY rowid').fetchall()
+        if not rows:
+            return default
+        if collection == 'users':
+            return {name: json.loads(data) for name, data in rows}
+        return [json.loads(data) for _, data in rows]
+
+    def save(self, filename, data):
+        """Save a collection, writing only the rows that changed"""
+        collection = COLLECTIONS.get(os.path.basename(filename))
+        if collection is None:
+            return self._fallback.save(filename, data)
+
+        table, key, columns, insert_only = self.TABLES[collection]
+        new_rows = self._rows(collection, data)
+        with self.transaction() as conn:
+            old_rows = dict(conn.execute(f'SELECT {key}, data FROM {table}'))
+            stale = [(k,) for k in old_rows if k not in new_rows]
+            changed = [(k,) + row for k, row in new_rows.items() if old_rows.get(k) != row[-1]]
+            if stale:
+                if collection == 'orders':
+                    # Keep the id sequence past the orders being removed
+                    self._set_meta(conn, 'order_seq', self._last_order_id(conn))
+                conn.executemany(f'DELETE FROM {table} WHERE {key} = ?', stale)
+            if changed:
+                names = (key,) + columns + insert_only + ('data',)
+                updates = ', '.join(f'{name} = excluded.{name}' for name in columns + ('data',))
+                conn.executemany(f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+                                 f"ON CONFLICT({key}) DO UPDATE SET {updates}", changed)
+            if stale or changed:
+                self._bump(conn, f'{collection}_version')
+                if collection == 'orders':
+                    self._rebuild_stats(conn)
+
+    def exists(self, filename):
+        """Tables always exist once the database is open"""
+        if COLLECTIONS.get(os.path.basename(filename)) is None:
+            return self._fallback.exists(filename)
+        return True
+
+    def signature(self, filename):
+        """Change detector: a version counter bumped on every write"""
+        collection = COLLECTIONS.get(os.path.basename(filename))
+        if collection is None:
+            return self._fallback.signature(filename)
+        row = self._connect().execute('SELECT value FROM meta WHERE key = ?',
+                                      (f'{collection}_version',)).fetchone()
+        return ('sqlite', row[0] if row else 0)
+
+    def append_orders(self, orders):
+        """Insert orders and add them to the statistics, all or nothing
+
+        Runs in a savepoint, so a failure partway (say a duplicate id)
+        undoes the rows already inserted even when the caller catches the
+        error and commits the enclosing transaction.
+        """
+        with self.transaction() as conn:
+            conn.execute('SAVEPOINT append_orders')
+            try:
+                conn.executemany('INSERT INTO orders (order_id, username, status, token, data) VALUES (?, ?, ?, ?, ?)',
+                                 [(order['order_id'], order['username'], order['status'], order.get('token'),
+                                   json.dumps(order)) for order in orders])
+                changes = {}
+                for order in orders:
+                    for view, key, field, delta in stats.contributions(order):
+                        changes[view, key, field] = changes.get((view, key, field), 0) + delta
+                self._apply_stats(conn, [k + (delta,) for k, delta in changes.items()])
+            except BaseException:
+                conn.execute('ROLLBACK TO append_orders')
+                conn.execute('RELEASE append_orders')
+                raise
+            conn.execute('RELEASE append_orders')
+
+    def set_order_status(self, order_id, status):
+        """Change one order's status; returns False for an unknown order"""
+        return not self.set_order_statuses({order_id: status})
+
+    def set_order_statuses(self, changes):
+        """Apply {order_id: status} changes in one transaction; returns the unknown ids"""
+        missing = []
+        with self.transaction() as conn:
+            for order_id, status in changes.items():
+                row = conn.execute('SELECT data FROM orders WHERE order_id = ?', (order_id,)).fetchone()
+                if row is None:
+                    missing.append(order_id)
+                    continue
+                self._apply_stats(conn, stats.status_change(json.loads(row[0]), status))
+                conn.execute("UPDATE orders SET status = ?, data = json_set(data, '$.status', ?) WHERE order_id = ?",
+                             (status, status, order_id))
+        return missing
+
+    def get_order_statuses(self, order_ids):
+        """{order_id: status} for the orders that exist"""
+        conn = self._connect()
+        return {order_id: row[0] for order_id in order_ids
+                for row in conn.execute('SELECT status FROM orders WHERE order_id = ?', (order_id,))}
+
+    @staticmethod
+    def _apply_stats(conn, changes):
+        conn.executemany("INSERT INTO order_stats (view, key, field, value) VALUES (?, ?, ?, ?) "
+                         "ON CONFLICT(view, key, field) DO UPDATE SET value = value + excluded.value",
+                         list(changes))
+
+    def get_order_stats(self, view, key=None):
+        """Read a materialized order statistics view"""
+        conn = self._connect()
+        if key is not None:
+            rows = conn.execute('SELECT field, value FROM order_stats WHERE view = ? AND key = ?', (view, key))
+            return {field: stats.add(0, value, field) for field, value in rows}
+        return self._records(conn.execute('SELECT key, field, value FROM order_stats WHERE view = ?', (view,)))
+
+    def get_order_stats_range(self, view, start, end):
+        """Read the records of a statistics view with keys in [start, end] (a primary key range scan)"""
+        return self._records(self._connect().execute(
+            'SELECT key, field, value FROM order_stats WHERE view = ? AND key BETWEEN ? AND ?', (view, start, end)))
+
+    @staticmethod
+    def _records(rows):
+        records = {}
+        for key, field, value in rows:
+            records.setdefault(key, {})[field] = stats.add(0, value, field)
+        return records
+
+    def order_stats(self):
+        """Every stored statistics view"""
+        return {view: self.get_order_stats(view) for view in stats.VIEWS}
+
+    def rebuild_order_stats(self):
+        """Recompute the statistics views from the orders table"""
+        with self.transaction() as conn:
+            self._rebuild_stats(conn)
+
+    def _rebuild_stats(self, conn):
+        orders = (json.loads(data) for data, in conn.execute('SELECT data FROM orders ORDER BY order_id'))
+        views = stats.compute(orders)
+        conn.execute('DELETE FROM order_stats')
+        conn.executemany('INSERT INTO order_stats (view, key, field, value) VALUES (?, ?, ?, ?)',
+                         [(view, key, field, value)
+                          for view, records in views.items()
+                          for key, record in records.items()
+                          for field, value in record.items()])
+        self._set_meta(conn, 'order_stats_version', stats.VERSION)
+
+    def next_order_id(self):
+        """Next id from the order sequence (call inside transaction())"""
+        with self.transaction() as conn:
+            last_id = self._last_order_id(conn) + 1
+            self._set_meta(conn, 'order_seq', last_id)
+            return last_id
+
+    def reserve_order_ids(self, count):
+        """Take count ids from the order sequence; returns the first"""
+        with self.transaction() as conn:
+            first = self._last_order_id(conn) + 1
+            self._set_meta(conn, 'order_seq', first + count - 1)
+            return first
+
+    @staticmethod
+    def _last_order_id(conn):
+        """Highest order id ever allocated or stored"""
+        row = conn.execute("SELECT value FROM meta WHERE key = 'order_seq'").fetchone()
+        stored = conn.execute('SELECT COALESCE(MAX(order_id), 0) FROM orders').fetchone()[0]
+        return max(row[0] if row else 0, stored)
+
+    def get_user_orders(self, username):
+        """One user's orders, oldest first (uses the username index)"""
+        rows = self._connect().execute(
+            'SELECT data FROM orders WHERE username = ? ORDER BY order_id', (username,))
+        return [json.loads(row[0]) for row in rows]
+
+    def get_order_by_token(self, token):
+        """The order placed with a checkout token, or None (uses the token index)"""
+        row = self._connect().execute('SELECT data FROM orders WHERE token = ?', (token,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_stock(self):
+        """Current stock level of every book, by id"""
+        return dict(self._connect().execute('SELECT id, stock FROM books'))
+
+    def set_stock(self, book_id, stock):
+        """Set one book's stock level (admin edits)"""
+        self.set_stocks({book_id: stock})
+
+    def set_stocks(self, stock):
+        """Set the stock level of many books in one transaction"""
+        with self.transaction() as conn:
+            conn.executemany('UPDATE books SET stock = ? WHERE id = ?',
+                             [(level, book_id) for book_id, level in stock.items()])
+            self._bump(conn, 'stock_version')
+
+    def reserve_stock_batch(self, requests):
+        """Take stock for a list of {book_id: quantity} requests in one transaction
+
+        Requests are filled in order against the running levels; each one is
+        all-or-nothing: either every line is filled, or nothing is taken and
+        its unfillable lines are returned as [(book_id, requested, available)].
+        Returns one shortfall list per request (empty when it was filled).
+        """
+        book_ids = sorted({book_id for quantities in requests for book_id in quantities})
+        with self.transaction() as conn:
+            levels = {}
+            for start in range(0, len(book_ids), 500):
+                chunk = book_ids[start:start + 500]
+                levels.update(conn.execute(
+                    f"SELECT id, stock FROM books WHERE id IN ({', '.join('?' * len(chunk))})", chunk))
+            before = dict(levels)
+            results = _fill_requests(levels, requests)
+            taken = [(before[book_id] - level, book_id) for book_id, level in levels.items()
+                     if level != before[book_id]]
+            if taken:
+                conn.executemany('UPDATE books SET stock = stock - ? WHERE id = ?', taken)
+                self._bump(conn, 'stock_version')
+            return results
+
+    def release_stock(self, quantities):
+        """Give back stock taken by reserve_stock_batch (failed checkout)"""
+        with self.transaction() as conn:
+            conn.executemany('UPDATE books SET stock = stock + ? WHERE id = ?',
+                             [(qty, book_id) for book_id, qty in quantities.items()])
+            self._bump(conn, 'stock_version')
+
+    def stock_signature(self):
+        """Change detector for stock levels"""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'stock_version'").fetchone()
+        return ('sqlite', row[0] if row else 0)
+
+    def is_empty(self):
+        """Check whether any collection already holds data"""
+        conn = self._connect()
+        return not any(conn.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone()
+                       for table, _, _, _ in self.TABLES.values())
+
+
+def _fill_requests(levels, requests):
+    """Fill stock requests in order, decrementing levels in place (see reserve_stock_batch)"""
+    results = []
+    for quantities in requests:
+        shortfalls = [(book_id, qty, levels.get(book_id, 0))
+                      for book_id, qty in quantities.items() if levels.get(book_id, 0) < qty]
+        if not shortfalls:
+            for book_id, qty in quantities.items():
+                levels[book_id] -= qty
+        results.append(shortfalls)
+    return results
+
+
+BACKENDS = {
+    'json': JsonBackend,
+    'sqlite': SqliteBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+# Ready marker: the backend whose data bootstrap() has seeded and checked
+_ready_backend = None
+_bootstrap_lock = threading.Lock()
+
+
+def create_backend(name=None):
+    """Create a backend by name (defaults to the configured one)"""
+    name = name or get_setting('storage', 'backend', 'json')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}' (expected one of: {', '.join(BACKENDS)})")
+    fsync = get_setting('storage', 'orders_fsync', 'always')
+    if name == 'sqlite':
+        return SqliteBackend(get_setting('storage', 'sqlite_path', 'bookstore.db'), fsync=fsync)
+    return JsonBackend(fsync=fsync, fsync_interval=get_setting('storage', 'orders_fsync_interval', 1.0),
+                       coalesce_window=get_setting('storage', 'write_coalesce_ms', 0) / 1000)
+
+
+def get_backend():
+    """Get the process-wide storage backend"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def reset_backend():
+    """Forget the process-wide backend so the next call re-reads the settings"""
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def bootstrap(seed):
+    """Run seed() once per process to create and check the data collections
+
+    The first call for the configured backend runs seed() in a storage
+    transaction (so concurrent server processes don't seed twice) and then
+    marks the backend ready; every later call only compares the marker,
+    which is cheap enough for every script run. reset_backend() clears it.
+    """
+    global _ready_backend
+    backend = get_backend()
+    if _ready_backend is backend:
+        return
+    with _bootstrap_lock:
+        if _ready_backend is not backend:
+            with backend.transaction():
+                seed()
+            _ready_backend = backend
+
+
+def load_json(filename, default):
+    """Load a collection (or any JSON file) through the configured backend"""
+    return get_backend().load(filename, default)
+
+
+def save_json(filename, data):
+    """Save a collection (or any JSON file) through the configured backend"""
+    get_backend().save(filename, data)
+
+
+def flush():
+    """Write out any coalesced saves now"""
+    flush_backend = getattr(get_backend(), 'flush', None)
+    if flush_backend is not None:
+        flush_backend()
+
+
+def exists(filename):
+    """Check whether a collection has been created"""
+    return get_backend().exists(filename)
+
+
+def signature(filename):
+    """Get a cheap token that changes whenever a collection is written"""
+    return get_backend().signature(filename)
+
+
+def append_orders(orders):
+    """Store new orders with a single write"""
+    get_backend().append_orders(orders)
+
+
+def set_order_status(order_id, status):
+    """Change one order's status; returns False for an unknown order"""
+    return get_backend().set_order_status(order_id, status)
+
+
+def set_order_statuses(changes):
+    """Apply {order_id: status} changes as one write; returns the ids that don't exist"""
+    return get_backend().set_order_statuses(changes)
+
+
+def get_order_statuses(order_ids):
+    """{order_id: current status} for the orders that exist"""
+    return get_backend().get_order_statuses(order_ids)
+
+
+def get_user_orders(username):
+    """One user's orders, oldest first, without reading anyone else's"""
+    return get_backend().get_user_orders(username)
+
+
+def get_order_by_token(token):
+    """The order placed with a checkout token, or None (an index lookup)"""
+    return get_backend().get_order_by_token(token)
+
+
+def next_order_id():
+    """Allocate the next order id from a monotonic sequence
+
+    Ids are never reused, even after orders are removed. Call it inside
+    transaction() and store the order before leaving it.
+    """
+    return get_backend().next_order_id()
+
+
+def reserve_order_ids(count):
+    """Take a block of count ids from the order sequence now, for orders
+    stored later; returns them as a range. Ids left unused are skipped."""
+    first = get_backend().reserve_order_ids(count)
+    return range(first, first + count)
+
+
+def get_order_stats(view, key=None):
+    """Read a materialized order statistics view (see stats.py)
+
+    get_order_stats('user') returns {username: {'orders', 'spent', 'items'}};
+    get_order_stats('user', 'alice') returns just alice's record.
+    """
+    return get_backend().get_order_stats(view, key)
+
+
+def get_order_stats_range(view, start, end):
+    """Read the records of a statistics view with keys in [start, end]
+
+    Used for the time rollups, whose keys sort chronologically:
+    get_order_stats_range('daily', '2024-01-01', '2024-01-31').
+    """
+    return get_backend().get_order_stats_range(view, start, end)
+
+
+def check_order_stats(rebuild=False):
+    """Compare stored order statistics with a recount from the orders
+
+    Returns the drift found as (view, key, field, stored, expected) tuples;
+    with rebuild=True the stored statistics are then recomputed.
+    """
+    backend = get_backend()
+    with backend.transaction():
+        problems = stats.drift(backend.order_stats(), stats.compute(backend.load(ORDERS_FILE, [])))
+        if rebuild:
+            backend.rebuild_order_stats()
+    return problems
+
+
+def transaction():
+    """Context manager that makes the enclosed storage writes atomic
+
+    JSON backend: holds a cross-process lock. SQLite: one IMMEDIATE
+    transaction, rolled back if the block raises.
+    """
+    return get_backend().transaction()
+
+
+def get_stock():
+    """Current stock level of every book, by id"""
+    return get_backend().get_stock()
+
+
+def set_stock(book_id, stock):
+    """Set one book's stock level"""
+    get_backend().set_stock(book_id, stock)
+
+
+def set_stocks(stock):
+    """Set the stock level of many books ({book_id: stock}) in one write"""
+    get_backend().set_stocks(stock)
+
+
+def reserve_stock_batch(requests):
+    """Take stock for a list of {book_id: quantity} requests, filled in order,
+    with a single write; returns one shortfall list per request"""
+    return get_backend().reserve_stock_batch(requests)
+
+
+def release_stock(quantities):
+    """Give back stock taken by reserve_stock_batch"""
+    get_backend().release_stock(quantities)
+
+
+def stock_signature():
+    """Get a cheap token that changes whenever any stock level does"""
+    return get_backend().stock_signature()
+
+
+def migrate_json_to_sqlite(db_path, force=False):
+    """Copy users.json, books.json and orders.json into a SQLite database"""
+    source = JsonBackend()
+    target = SqliteBackend(db_path)
+    if not force and not target.is_empty():
+        raise RuntimeError(f"{db_path} already contains data (use --force to overwrite)")
+
+    counts = {}
+    for filename, collection in COLLECTIONS.items():
+        data = source.load(filename, {} if collection == 'users' else [])
+        target.save(filename, data)
+        counts[collection] = len(data)
+    # Saving books never changes existing stock levels, so copy them over
+    target.set_stocks(source.get_stock())
+    # Carry the id sequence over too: ids reserved or used by removed orders
+    # are above the highest migrated order and must not be handed out again
+    with source.transaction(), target.transaction() as conn:
+        last_id = max(target._last_order_id(conn), source.next_order_id() - 1)
+        target._set_meta(conn, 'order_seq', last_id)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BookStore storage maintenance")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate = commands.add_parser('migrate', help="copy the JSON data files into SQLite")
+    migrate.add_argument('--db', default=get_setting('storage', 'sqlite_path', 'bookstore.db'),
+                         help="SQLite database path (default: storage.sqlite_path or bookstore.db)")
+    migrate.add_argument('--force', action='store_true', help="overwrite a non-empty database")
+
+    commands.add_parser('compact-orders', help="fold status updates back into the JSON order log")
+
+    check = commands.add_parser('check-stats', help="check the SQLite order statistics for drift")
+    check.add_argument('--rebuild', action='store_true', help="recompute the statistics from the orders")
+
+    args = parser.parse_args(argv)
+    if args.command == 'migrate':
+        try:
+            counts = migrate_json_to_sqlite(args.db, force=args.force)
+        except RuntimeError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        print(f"✅ Migrated {counts['users']} users, {counts['books']} books and "
+              f"{counts['orders']} orders into {args.db}")
+        print("Set backend = \"sqlite\" under [storage] in config.toml to use it.")
+    elif args.command == 'compact-orders':
+        backend = get_backend()
+        if backend.name != 'json':
+            print(f"❌ compact-orders only applies to the JSON backend (configured: {backend.name})", file=sys.stderr)
+            return 1
+        before, after = backend.orders.compact()
+        print(f"✅ Compacted {backend.order_log_path}: {before} -> {after} bytes")
+    elif args.command == 'check-stats':
+        backend = get_backend()
+        if backend.name != 'sqlite':
+            # JSON statistics live in memory and are rebuilt from the order log by
+            # every process that opens it, so this process would only compare the
+            # log with itself, and --rebuild couldn't reach the running server
+            print(f"❌ check-stats only applies to the SQLite backend (configured: {backend.name}); "
+                  f"JSON order statistics are recomputed from the order log whenever a process opens it",
+                  file=sys.stderr)
+            return 1
+        problems = check_order_stats(rebuild=args.rebuild)
+        for view, key, field, stored, expected in problems:
+            print(f"⚠️ {view} {key!r} {field}: stored {stored}, recounted {expected}")
+        if not problems:
+            print("✅ Order statistics match the orders")
+        elif args.rebuild:
+            print(f"✅ Rebuilt order statistics ({len(problems)} values were off)")
+        else:
+            print(f"❌ {len(problems)} values drifted; run with --rebuild to fix them", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,11 @@
 import streamlit as st
-import pandas as pd
 import json
 import hashlib
 from datetime import datetime
 import os
 
+import theme
+
 # Page configuration
 st.set_page_config(
     page_title="BookStore - Your Online Book Shop",
@@ -275,59 +276,7 @@ def show_login_page():
     """Display sleek and professional login/register page"""
     
     # Custom CSS for professional styling
-    st.markdown("""
-        <style>
-        .main-header {
-            text-align: center;
-            padding: 2rem 0;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border-radius: 10px;
-            margin-bottom: 2rem;
-        }
-        .main-header h1 {
-            font-size: 3rem;
-            margin: 0;
-            font-weight: 700;
-        }
-        .main-header p {
-            font-size: 1.2rem;
-            margin: 0.5rem 0 0 0;
-            opacity: 0.9;
-        }
-        .login-container {
-            max-width: 500px;
-            margin: 0 auto;
-            padding: 2rem;
-            background: white;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }
-        .stButton>button {
-            width: 100%;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            padding: 0.75rem;
-            font-size: 1.1rem;
-            font-weight: 600;
-            border-radius: 5px;
-            margin-top: 1rem;
-        }
-        .stButton>button:hover {
-            background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
-            transform: translateY(-2px);
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-        }
-        .feature-box {
-            background: #f8f9fa;
-            padding: 1.5rem;
-            border-radius: 8px;
-            margin: 1rem 0;
-            border-left: 4px solid #667eea;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(theme.style('login'), unsafe_allow_html=True)
     
     # Header
     st.markdown("""
@@ -1080,53 +1029,7 @@ def main():
         return
     
     # Custom CSS for professional styling
-    st.markdown("""
-        <style>
-        .header-container {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 1.5rem;
-            border-radius: 10px;
-            margin-bottom: 1rem;
-            color: white;
-        }
-        .user-info {
-            background: rgba(255, 255, 255, 0.2);
-            padding: 0.5rem 1rem;
-            border-radius: 5px;
-            display: inline-block;
-        }
-        .cart-summary {
-            background: #f8f9fa;
-            padding: 1rem;
-            border-radius: 8px;
-            border-left: 4px solid #667eea;
-            margin: 1rem 0;
-        }
-        .stTabs [data-baseweb="tab-list"] {
-            gap: 2rem;
-            background-color: #f8f9fa;
-            padding: 0.5rem 1rem;
-            border-radius: 10px;
-        }
-        .stTabs [data-baseweb="tab"] {
-            padding: 1rem 2rem;
-            font-weight: 600;
-            font-size: 1.1rem;
-        }
-        .stTabs [aria-selected="true"] {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white !important;
-            border-radius: 5px;
-        }
-        .metric-card {
-            background: white;
-            padding: 1.5rem;
-            border-radius: 8px;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-            text-align: center;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(theme.style('app'), unsafe_allow_html=True)
     
     # Header with user info
     col1, col2, col3 = st.columns([2, 2, 1])
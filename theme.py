@@ -0,0 +1,18 @@
+"""
+Stylesheets for the BookStore app.
+
+The CSS lives in static/*.css and is read once per server process; script
+runs only look up the cached <style> block instead of rebuilding it.
+"""
+
+import functools
+import os
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+
+@functools.lru_cache(maxsize=None)
+def style(name):
+    """<style> block for static/<name>.css, e.g. st.markdown(style('app'), unsafe_allow_html=True)"""
+    with open(os.path.join(STATIC_DIR, f'{name}.css'), encoding='utf-8') as f:
+        return f"<style>\n{f.read()}</style>"